@@ -0,0 +1,326 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from utils.config_manager import root as get_project_root
+from utils.scanner import scan_project
+from utils.response_cache import ResponseCache
+from utils.chunker import estimate_tokens, pack_batches
+from utils.analysis_merge import reduce_analyses
+from utils.openai_client import get_client, load_environment, create_completion, get_rate_limiter
+from utils.stream_parser import ToolArgumentsParser
+from utils.skeleton import DEFAULT_MAX_FILE_BYTES, compact_files
+from utils.telemetry import span, propagate, record_usage, enabled as telemetry_enabled
+
+
+class BaseAgent:
+    """
+    Shared plumbing for the specialised analysis agents.
+
+    Subclasses describe their analysis through the class attributes below.
+    The OpenAI client and the system prompt (read from the environment
+    variable named by ``system_prompt_env``) are resolved on first use, so
+    constructing an agent performs no I/O.
+    """
+
+    model = "gpt-4o-mini"
+    analysis_model = None
+    tool_name = None
+    tool_description = None
+    instruction = None
+    system_prompt_env = None
+    expected_completion_tokens = 2000
+    content_mode = "full"
+    shares_context = True
+
+    def __init__(self, client=None, system_prompt=None, cache=None, incremental=None, max_prompt_tokens=100000, batch_workers=4, on_finding=None,
+                 content_mode=None, max_file_bytes=DEFAULT_MAX_FILE_BYTES, shared_context=None):
+        """
+        :param client: The OpenAI client used for model requests; defaults to the shared client
+        :param system_prompt: The agent's system prompt; defaults to the ``system_prompt_env`` variable
+        :param cache: An optional ResponseCache for parsed results
+        :param incremental: An optional IncrementalStore; when set only changed files are re-sent
+        :param max_prompt_tokens: Token budget of a single request; larger inputs are split into batches
+        :param batch_workers: How many batches of one agent may be in flight at the same time
+        :param on_finding: Optional ``callback(agent, category, item)``; when set the completion is
+            streamed and each list item is reported as soon as it has been received
+        :param content_mode: "full" sends file contents, "skeleton" only their structure; defaults to the class setting
+        :param max_file_bytes: Larger (and generated) files are reduced to their skeleton and capped at this size
+        :param shared_context: A SharedContext; when set the model analyses the run's shared codebase prompt
+        """
+        self._client = client
+        self._system_prompt = system_prompt
+        self.cache = cache
+        self.incremental = incremental
+        self.max_prompt_tokens = max_prompt_tokens
+        self.batch_workers = max(1, batch_workers)
+        self.on_finding = on_finding
+        if content_mode is not None:
+            self.content_mode = content_mode
+        self.max_file_bytes = max_file_bytes
+        self.shared_context = shared_context
+        # A result already received for this agent (e.g. from ManagerAgent's fused request), used instead of asking
+        self.fused_result = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def system_prompt(self):
+        if self._system_prompt is None and self.system_prompt_env:
+            load_environment()
+            self._system_prompt = os.getenv(self.system_prompt_env)
+        return self._system_prompt
+
+    def should_analyze_file(self, file_path):
+        raise NotImplementedError
+
+    def scan(self):
+        project_root = get_project_root()
+        if not project_root:
+            raise FileNotFoundError("butterfly.config.py not found in this or any parent directory")
+        return scan_project(project_root)
+
+    def load_files(self, inventory=None):
+        """
+        Select this agent's files from a project inventory.
+
+        :param inventory: A FileInventory shared between agents; the project is scanned when omitted
+        :return: A tuple of (file_paths, file_contents)
+        """
+        if inventory is None:
+            inventory = self.scan()
+
+        records = self.select_files(inventory)
+        readable = [record for record in records if record.content is not None]
+        return [record.path for record in readable], [record.content for record in readable]
+
+    def select_files(self, inventory):
+        """Pick this agent's records from ``inventory`` and make sure their contents are loaded."""
+        with span("filter", agent=self.tool_name) as selected:
+            records = inventory.select(self.should_analyze_file)
+            selected.set(files=len(records))
+        with span("read", agent=self.tool_name) as read:
+            read.set(bytes=inventory.preload(records))
+        return records
+
+    def analyze_codebase(self, inventory=None):
+        """
+        Analyze this agent's files, only re-sending changed ones when an IncrementalStore is attached.
+
+        :param inventory: A FileInventory shared between agents; the project is scanned when omitted
+        """
+        if inventory is None:
+            inventory = self.scan()
+
+        if self.incremental is not None:
+            return self.incremental.analyze(self, self.select_files(inventory))
+
+        return self.request_analysis(*self.load_files(inventory))
+
+    def build_tools(self):
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": self.tool_name,
+                    "description": self.tool_description,
+                    "parameters": self.analysis_model.schema(),
+                }
+            }
+        ]
+
+    def fused_section(self, inventory):
+        """
+        What this agent asks for in a fused request over the shared codebase, or None when it needs no model call.
+        """
+        return "\n\n".join(part for part in (self.system_prompt, self.instruction) if part)
+
+    def fused_cache_key(self, inventory):
+        """The ResponseCache key of this agent's own request for the single-batch shared codebase of a fused run."""
+        return self.cache_key(self.shared_context.tools, *self.shared_context.batches[0])
+
+    def cache_key(self, tools, file_paths, file_contents):
+        return ResponseCache.make_key(self.model, self.system_prompt, self.instruction, tools, file_paths, file_contents)
+
+    def build_messages(self, file_paths, file_contents):
+        content = "\n\n".join([f"File: {path}\n\nContent:\n{content}" for path, content in zip(file_paths, file_contents)])
+
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"{self.instruction}\n\n{content}"}
+        ]
+
+    def estimate_request_tokens(self, messages):
+        """Rough prompt plus completion size charged against the TPM limit before sending."""
+        return sum(len(message["content"] or "") for message in messages) // 4 + self.expected_completion_tokens
+
+    def parse_response(self, response):
+        if response.choices[0].message.tool_calls:
+            tool_call = response.choices[0].message.tool_calls[0]
+            if tool_call.function.name == self.tool_name:
+                return self.analysis_model.parse_raw(tool_call.function.arguments)
+
+        return None
+
+    def request_analysis(self, file_paths, file_contents):
+        """
+        Analyze the files, map-reducing over batches when they exceed the prompt budget.
+
+        Files are packed into batches under ``max_prompt_tokens`` (large files
+        are split on function or class boundaries), the batches are analysed in
+        parallel and the partial results are reduced into one analysis model.
+        Contents are compacted first according to ``content_mode``. When a
+        SharedContext is attached, its batches (the codebase shared by all
+        agents of the run) are analysed instead. A ``fused_result`` set
+        beforehand is returned (once) without asking the model.
+        """
+        if self.fused_result is not None:
+            result, self.fused_result = self.fused_result, None
+            self.report_findings(result)
+            return result
+        if self.shared_context is not None and len(self.shared_context):
+            jobs = [(paths, contents, index) for index, (paths, contents) in enumerate(self.shared_context.batches)]
+        else:
+            with span("prompt_build", agent=self.tool_name) as build:
+                file_paths, file_contents = compact_files(file_paths, file_contents, self.content_mode, self.max_file_bytes)
+                overhead = estimate_tokens(
+                    (self.system_prompt or "") + (self.instruction or "") + json.dumps(self.analysis_model.schema())
+                )
+                batches = pack_batches(file_paths, file_contents, max(1, self.max_prompt_tokens - overhead))
+                build.set(files=len(file_paths), batches=len(batches))
+            if len(batches) <= 1:
+                return self.request_batch(file_paths, file_contents)
+            jobs = [(paths, contents, None) for paths, contents in batches]
+        if len(jobs) == 1:
+            return self.request_batch(*jobs[0])
+
+        request_batch = propagate(lambda job: self.request_batch(*job))
+        with ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix=f"{self.tool_name}-batch") as executor:
+            results = list(executor.map(request_batch, jobs))
+        return reduce_analyses(self.analysis_model, results)
+
+    def request_batch(self, file_paths, file_contents, shared_batch=None):
+        """
+        Send one batch of files to the model and parse the reported tool call.
+
+        When a ResponseCache is attached, an identical request (same prompts,
+        schema, model and file contents) is answered from the cache instead.
+
+        :param shared_batch: Index of the SharedContext batch holding these files, if the prompt is built from it
+        """
+        shared = shared_batch is not None
+        tools = self.shared_context.tools if shared else self.build_tools()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(tools, file_paths, file_contents)
+            with span("cache_lookup", agent=self.tool_name) as lookup:
+                cached = self.cache.get(cache_key)
+                lookup.set(hit=cached is not None)
+            if cached is not None:
+                result = self.analysis_model.parse_raw(cached)
+                self.report_findings(result)
+                return result
+
+        with span("prompt_build", agent=self.tool_name):
+            if shared:
+                messages = self.shared_context.build_messages(shared_batch, self.system_prompt, self.instruction)
+            else:
+                messages = self.build_messages(file_paths, file_contents)
+        # With a shared prefix every agent offers every tool, so the agent's own one is forced
+        tool_choice = {"type": "function", "function": {"name": self.tool_name}} if shared else "auto"
+        send = lambda: self.send_request(messages, tools, tool_choice)
+        result = self.shared_context.request(shared_batch, send) if shared else send()
+
+        if cache_key is not None and result is not None:
+            self.cache.put(cache_key, self.tool_name, result.json())
+        return result
+
+    def send_request(self, messages, tools, tool_choice="auto"):
+        """Ask the model (streaming when findings are reported live) and parse the result."""
+        if self.on_finding is not None:
+            return self.request_streaming(messages, tools, tool_choice)
+        with self.request_span(messages, tools) as request:
+            response = create_completion(
+                self.client,
+                estimated_tokens=self.estimate_request_tokens(messages),
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice
+            )
+            self.track_usage(request, getattr(response, "usage", None))
+        with span("parse", agent=self.tool_name):
+            return self.parse_response(response)
+
+    def track_usage(self, request, usage):
+        record_usage(request, usage)
+        if self.shared_context is not None:
+            self.shared_context.record_usage(usage)
+
+    def request_span(self, messages, tools, **attributes):
+        """A ``model_request`` span carrying the size of what is sent (only measured while telemetry is on)."""
+        if telemetry_enabled():
+            attributes["bytes_sent"] = len(json.dumps({"messages": messages, "tools": tools}).encode("utf-8"))
+        return span("model_request", agent=self.tool_name, model=self.model, **attributes)
+
+    def request_streaming(self, messages, tools, tool_choice="auto"):
+        """
+        Stream the completion, reporting list items of the tool call's arguments as they complete.
+
+        The assembled arguments are parsed into the analysis model exactly as
+        in the non-streaming path once the stream ends.
+        """
+        estimated_tokens = self.estimate_request_tokens(messages)
+        with self.request_span(messages, tools, streamed=True) as request:
+            stream = create_completion(
+                self.client,
+                estimated_tokens=estimated_tokens,
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            calls = {}
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    get_rate_limiter().reconcile(estimated_tokens, chunk.usage.total_tokens)
+                    self.track_usage(request, chunk.usage)
+                if not chunk.choices:
+                    continue
+                for delta in chunk.choices[0].delta.tool_calls or ():
+                    call = calls.setdefault(delta.index, {"name": None, "arguments": [], "parser": ToolArgumentsParser()})
+                    if delta.function is None:
+                        continue
+                    if delta.function.name:
+                        call["name"] = delta.function.name
+                    if delta.function.arguments:
+                        call["arguments"].append(delta.function.arguments)
+                        if call["name"] == self.tool_name:
+                            for category, item in call["parser"].feed(delta.function.arguments):
+                                self.on_finding(self.tool_name, category, item)
+
+        with span("parse", agent=self.tool_name):
+            for index in sorted(calls):
+                if calls[index]["name"] == self.tool_name:
+                    return self.analysis_model.parse_raw("".join(calls[index]["arguments"]))
+        return None
+
+    def report_findings(self, result):
+        """Report every list item of an already complete result (e.g. from the cache) to ``on_finding``."""
+        if self.on_finding is None or result is None:
+            return
+        for category, value in result.dict().items():
+            if isinstance(value, list):
+                for item in value:
+                    self.on_finding(self.tool_name, category, item)
@@ -1,19 +1,9 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
 import fnmatch
-from utils.config_manager import root as get_project_root
 from pydantic import BaseModel
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Load the system prompt from .env
-DEPENDENCY_SYS_PROMPT = os.getenv("DEPENDENCY_SYS_PROMPT")
+from .base_agent import BaseAgent
+from utils.dependency_resolver import is_manifest, resolve_dependencies
+from utils.telemetry import span
 
 class DependencyAnalysis(BaseModel):
     directDependencies: list[dict]
@@ -26,43 +16,25 @@ class DependencyAnalysis(BaseModel):
     overallDependencyHealth: str
     keyRecommendations: list[str]
 
-class DependencyAgent:
-    def __init__(self):
-        self.client = client
-        self.system_prompt = DEPENDENCY_SYS_PROMPT
+class DependencyAgent(BaseAgent):
+    analysis_model = DependencyAnalysis
+    tool_name = "report_dependency_analysis"
+    tool_description = "Report the dependency analysis of the codebase"
+    instruction = (
+        "The dependencies of the codebase were resolved locally from its manifests, lock files and imports; "
+        "the direct, transitive and unused sets and the graph metrics below are exact. Assess licensing issues, "
+        "outdated and vulnerable dependencies, overall risk and recommendations for this dependency summary:"
+    )
+    system_prompt_env = "DEPENDENCY_SYS_PROMPT"
+    # Cap on the dependencies listed in the prompt; the counts in the summary stay exact
+    summary_limit = 300
+    # The model sees the dependency summary, not the codebase shared by the other agents
+    shares_context = False
+    locally_resolved_fields = ("directDependencies", "transitiveDependencies", "unusedDependencies", "dependencyGraphComplexity")
+    _resolved = None
 
     def analyze_dependencies(self, file_paths, file_contents):
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "report_dependency_analysis",
-                    "description": "Report the dependency analysis of the codebase",
-                    "parameters": DependencyAnalysis.schema(),
-                }
-            }
-        ]
-
-        content = "\n\n".join([f"File: {path}\n\nContent:\n{content}" for path, content in zip(file_paths, file_contents)])
-
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"Analyze the dependencies of the following codebase:\n\n{content}"}
-        ]
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
-
-        if response.choices[0].message.tool_calls:
-            tool_call = response.choices[0].message.tool_calls[0]
-            if tool_call.function.name == "report_dependency_analysis":
-                return DependencyAnalysis.parse_raw(tool_call.function.arguments)
-
-        return None
+        return self.request_analysis(file_paths, file_contents)
 
     def should_analyze_file(self, file_path):
         patterns_to_analyze = [
@@ -85,26 +57,76 @@ class DependencyAgent:
 
         return any(fnmatch.fnmatch(file_path, pattern) for pattern in patterns_to_analyze)
 
-    def analyze_codebase_dependencies(self):
-        project_root = get_project_root()
-        if not project_root:
-            raise FileNotFoundError("butterfly.config.py not found in this or any parent directory")
-
-        file_paths = []
-        file_contents = []
-        for root_dir, _, files in os.walk(project_root):
-            for file in files:
-                file_path = os.path.join(root_dir, file)
-                if self.should_analyze_file(file_path):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            file_content = f.read()
-                        file_paths.append(file_path)
-                        file_contents.append(file_content)
-                    except Exception as e:
-                        print(f"Error reading file {file_path}: {str(e)}")
-
-        return self.analyze_dependencies(file_paths, file_contents)
+    def analyze_codebase(self, inventory=None):
+        """
+        Resolve dependencies locally and ask the model only for commentary on a compact summary.
+
+        With an IncrementalStore the commentary is only requested again once a manifest or lock file changed.
+
+        :param inventory: A FileInventory shared between agents; the project is scanned when omitted
+        """
+        if inventory is None:
+            inventory = self.scan()
+
+        resolved = self.resolve(inventory)
+        local = {field: resolved[field] for field in self.locally_resolved_fields}
+        if not resolved["metrics"]["manifests"]:
+            return DependencyAnalysis(
+                **local,
+                outdatedDependenciesCount=0,
+                vulnerableDependenciesCount=0,
+                licensingIssues=[],
+                overallDependencyHealth="No dependency manifests found",
+                keyRecommendations=[],
+            )
+
+        request = lambda: self.request_analysis(["dependency-summary.json"], [self.build_summary(resolved)])
+        if self.incremental is not None:
+            # Keyed on the manifests and lock files; the locally resolved fields are recomputed every run
+            manifests = inventory.select(is_manifest)
+            inventory.preload(manifests)
+            result = self.incremental.analyze_whole(self, manifests, request)
+        else:
+            result = request()
+        if result is None:
+            return None
+        return DependencyAnalysis.parse_obj({**result.dict(), **local})
+
+    def resolve(self, inventory):
+        """Resolve the dependencies of ``inventory``, once per inventory."""
+        if self._resolved is None or self._resolved[0] is not inventory:
+            with span("local_analysis", agent=self.tool_name):
+                self._resolved = (inventory, resolve_dependencies(inventory))
+        return self._resolved[1]
+
+    def fused_section(self, inventory):
+        resolved = self.resolve(inventory)
+        if not resolved["metrics"]["manifests"]:
+            return None
+        summary = self.build_summary(resolved)
+        return f"{super().fused_section(inventory)}\n\nFile: dependency-summary.json\n\nContent:\n{summary}"
+
+    def fused_cache_key(self, inventory):
+        return self.cache_key(self.build_tools(), ["dependency-summary.json"], [self.build_summary(self.resolve(inventory))])
+
+    def build_summary(self, resolved):
+        """A compact, deterministic JSON summary of the resolved dependencies for the prompt."""
+        def compact(dependencies):
+            return sorted(
+                "{ecosystem}:{name} {version}".format(**{**dependency, "version": dependency.get("locked") or dependency.get("version")})
+                for dependency in dependencies
+            )[:self.summary_limit]
+
+        return json.dumps({
+            "metrics": resolved["metrics"],
+            "direct": compact(d for d in resolved["directDependencies"] if not d["dev"]),
+            "development": compact(d for d in resolved["directDependencies"] if d["dev"]),
+            "transitive": compact(resolved["transitiveDependencies"]),
+            "unused": resolved["unusedDependencies"],
+        }, indent=1, sort_keys=True)
+
+    def analyze_codebase_dependencies(self, inventory=None):
+        return self.analyze_codebase(inventory)
 
 def main():
     agent = DependencyAgent()
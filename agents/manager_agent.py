@@ -1,8 +1,8 @@
 import sys
 import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,20 +12,89 @@ from .static_agent import StaticAgent
 from .code_quality_agent import CodeQualityAgent
 from .dependency_agent import DependencyAgent
 from .performance_agent import PerformanceAgent
+from utils.config_manager import root as get_project_root
+from utils.scanner import scan_project
+from utils.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from utils.incremental import IncrementalStore
+from utils.shared_context import SharedContext
+from utils.chunker import estimate_tokens
+from utils.skeleton import DEFAULT_MAX_FILE_BYTES
+from utils.openai_client import get_client, load_environment, create_completion
+from utils.telemetry import span, propagate, record_usage, enabled as telemetry_enabled
 
-# Load environment variables
-load_dotenv()
+FUSED_SYSTEM_PROMPT = "You are the lead of the code analysis team and perform all of its analyses yourself."
+FUSED_INSTRUCTION = (
+    "Perform every analysis described below on the codebase and report each one by calling its tool, "
+    "calling every tool exactly once in the same response."
+)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+class ManagerAgent:
+    def __init__(self, max_workers=5, agent_timeout=None, content_modes=None, shared_prefix=False, shared_content_mode="full",
+                 fused=False, **agent_options):
+        """
+        :param max_workers: How many agents may run at the same time; 1 runs them one after another
+        :param agent_timeout: Seconds an agent may run before its result is abandoned, or None for no limit
+        :param content_modes: Optional {report key: "full" | "skeleton"} overriding an agent's default content mode
+        :param shared_prefix: Send the codebase as one byte-identical prompt prefix shared by the agents, so the
+            provider's prompt cache serves it after the first request (full, non-incremental runs only)
+        :param shared_content_mode: Content mode of the shared codebase prompt
+        :param fused: Ask for all analyses in one request with every agent's tool when the codebase fits into
+            a single prompt; agents whose analysis is missing from the response ask separately (implies the
+            shared prompt layout, non-incremental runs only)
+        :param agent_options: Passed on to every specialized agent (cache, incremental, max_prompt_tokens, batch_workers, on_finding, max_file_bytes)
+        """
+        self.max_workers = max(1, max_workers)
+        self.agent_timeout = agent_timeout
+        self.content_modes = content_modes or {}
+        self.shared_prefix = shared_prefix
+        self.shared_content_mode = shared_content_mode
+        self.fused = fused
+        self.agent_options = agent_options
+        self.inventory = None
+        self.prompt_cache_usage = None
 
-# Load the system prompt from .env
-MANAGER_SYS_PROMPT = os.getenv("MANAGER_SYS_PROMPT")
+    @classmethod
+    def from_config(cls, config, base_dir=None, **agent_options):
+        """
+        Build a ManagerAgent as configured by a loaded butterfly.config.py.
 
-class ManagerAgent:
-    def __init__(self):
-        self.client = client
-        self.system_prompt = MANAGER_SYS_PROMPT
+        :param config: The loaded configuration (see ``load_config``)
+        :param base_dir: Directory a relative CACHE_PATH is resolved against; defaults to the working directory
+        :param agent_options: Further agent options, e.g. ``on_finding``
+        """
+        cache_path = config.get('CACHE_PATH', DEFAULT_CACHE_PATH)
+        if base_dir is not None:
+            cache_path = os.path.join(base_dir, cache_path)
+        cache = ResponseCache(
+            path=cache_path,
+            max_age=config.get('CACHE_MAX_AGE', 7 * 24 * 3600),
+            max_bytes=config.get('CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        )
+        incremental = None
+        if config.get('INCREMENTAL', False):
+            incremental = IncrementalStore(path=cache_path, dependent_depth=config.get('INCREMENTAL_DEPENDENTS', 1))
+        return cls(
+            max_workers=config.get('MAX_CONCURRENT_AGENTS', 5),
+            agent_timeout=config.get('AGENT_TIMEOUT'),
+            cache=cache,
+            incremental=incremental,
+            max_prompt_tokens=config.get('MAX_PROMPT_TOKENS', 100000),
+            batch_workers=config.get('BATCH_WORKERS', 4),
+            content_modes=config.get('CONTENT_MODES'),
+            max_file_bytes=config.get('MAX_FILE_BYTES', 262144),
+            shared_prefix=config.get('SHARED_PROMPT_PREFIX', False),
+            fused=config.get('FUSED_ANALYSIS', False),
+            **agent_options,
+        )
+
+    @property
+    def client(self):
+        return get_client()
+
+    @property
+    def system_prompt(self):
+        load_environment()
+        return os.getenv("MANAGER_SYS_PROMPT")
 
     def generate_report(self, agent_outputs):
         """
@@ -58,35 +127,236 @@ class ManagerAgent:
 
         return structured_report
 
-    def analyze_codebase(self):
+    def options_for(self, report_key):
+        """Constructor options of the agent reporting under ``report_key``."""
+        if report_key in self.content_modes:
+            return {**self.agent_options, "content_mode": self.content_modes[report_key]}
+        return self.agent_options
+
+    def analyze_codebase(self, inventory=None):
         """
         Analyze the codebase using all specialized agents and generate a structured report.
+
+        :param inventory: An up-to-date FileInventory (e.g. kept by the watch daemon); the project is scanned when omitted
         """
+        with span("analysis") as analysis:
+            report = self._analyze(inventory)
+            analysis.set(files=len(self.inventory), agent_errors=len(report.get("agentErrors", {})))
+            if self.prompt_cache_usage is not None:
+                analysis.set(cached_ratio=self.prompt_cache_usage["cachedRatio"])
+        return report
+
+    def _analyze(self, inventory):
+        self.prompt_cache_usage = None
+        if inventory is None:
+            project_root = get_project_root()
+            if not project_root:
+                raise FileNotFoundError("butterfly.config.py not found in this or any parent directory")
+
+            # Walk the project once; every agent selects its files from the same inventory
+            inventory = scan_project(project_root)
+        self.inventory = inventory
+
         # Initialize all agents
-        architecture_agent = ArchitectureAgent()
-        static_analysis_agent = StaticAgent()
-        code_quality_agent = CodeQualityAgent()
-        dependency_agent = DependencyAgent()
-        performance_agent = PerformanceAgent()
-
-        # Perform analyses
-        architecture_results = architecture_agent.analyze_codebase_architecture()
-        static_analysis_results = static_analysis_agent.analyze_codebase_static()
-        code_quality_results = code_quality_agent.analyze_codebase_quality()
-        dependency_results = dependency_agent.analyze_codebase_dependencies()
-        performance_results = performance_agent.analyze_codebase_performance()
-
-        # Combine all results
-        agent_outputs = {
-            "ARCHITECTURE_ANALYSIS": architecture_results,
-            "STATIC_CODE_ANALYSIS": static_analysis_results,
-            "CODE_QUALITY_ANALYSIS": code_quality_results,
-            "DEPENDENCY_AUDIT": dependency_results,
-            "PERFORMANCE_ANALYSIS": performance_results
+        architecture_agent = ArchitectureAgent(**self.options_for("ARCHITECTURE_ANALYSIS"))
+        static_agent = StaticAgent(**self.options_for("STATIC_CODE_ANALYSIS"))
+        code_quality_agent = CodeQualityAgent(**self.options_for("CODE_QUALITY_ANALYSIS"))
+        dependency_agent = DependencyAgent(**self.options_for("DEPENDENCY_AUDIT"))
+        performance_agent = PerformanceAgent(**self.options_for("PERFORMANCE_ANALYSIS"))
+        agents = {
+            "ARCHITECTURE_ANALYSIS": architecture_agent.analyze_codebase_architecture,
+            "STATIC_CODE_ANALYSIS": static_agent.analyze_codebase_static,
+            "CODE_QUALITY_ANALYSIS": code_quality_agent.analyze_codebase_quality,
+            "DEPENDENCY_AUDIT": dependency_agent.analyze_codebase_dependencies,
+            "PERFORMANCE_ANALYSIS": performance_agent.analyze_codebase_performance,
         }
 
+        shared_context = None
+        if (self.shared_prefix or self.fused) and self.agent_options.get("incremental") is None:
+            agent_instances = [architecture_agent, static_agent, code_quality_agent, dependency_agent, performance_agent]
+            shared_context = self.build_shared_context(agent_instances, inventory)
+            if self.fused:
+                self.request_fused(agent_instances, shared_context, inventory)
+
+        # Perform analyses concurrently
+        agent_outputs, agent_errors = self.run_agents(agents, inventory)
+        if shared_context is not None:
+            self.prompt_cache_usage = shared_context.usage()
+
         # Generate structured report
-        return self.generate_report(agent_outputs)
+        with span("report"):
+            report = self.generate_report(agent_outputs)
+        if agent_errors:
+            report["agentErrors"] = agent_errors
+        return report
+
+    def build_shared_context(self, agents, inventory):
+        """
+        Build the codebase prompt shared by the agents that send the codebase, and attach it to them.
+
+        It holds the union of those agents' files; every agent's tool
+        (including those of agents not sharing the codebase, for fused
+        requests) is offered in each request so that the tool definitions,
+        which belong to the cached prefix, are identical too.
+        """
+        sharing = [agent for agent in agents if agent.shares_context]
+        with span("prompt_build", shared=True) as build:
+            records = inventory.select(lambda path: any(agent.should_analyze_file(path) for agent in sharing))
+            inventory.preload(records)
+            readable = [record for record in records if record.content is not None]
+            reserved = max(estimate_tokens((agent.system_prompt or "") + (agent.instruction or "")) for agent in sharing)
+            shared_context = SharedContext(
+                [record.path for record in readable],
+                [record.content for record in readable],
+                [tool for agent in agents for tool in agent.build_tools()],
+                max_prompt_tokens=self.agent_options.get("max_prompt_tokens", 100000),
+                content_mode=self.shared_content_mode,
+                max_file_bytes=self.agent_options.get("max_file_bytes", DEFAULT_MAX_FILE_BYTES),
+                reserved_tokens=reserved,
+                # Batched requests are collected into one batch; holding agents back would split it in two
+                warm_first=not getattr(self.agent_options.get("client"), "batched", False),
+            )
+            build.set(files=len(readable), batches=len(shared_context))
+        for agent in sharing:
+            agent.shared_context = shared_context
+        return shared_context
+
+    def request_fused(self, agents, shared_context, inventory):
+        """
+        Ask for all analyses in a single request over the shared codebase and hand each agent its result.
+
+        The request offers every agent's tool and requires the model to call
+        them, so the codebase is sent (and charged) once instead of once per
+        agent. Each returned tool call is parsed into its agent's model and
+        set as the agent's ``fused_result`` and stored in its ResponseCache
+        under the key of the agent's own request; agents whose call is
+        missing or invalid then ask separately as usual. Agents whose result
+        is already cached are left out (and nothing is sent when all are).
+        Only done when the codebase fits into one batch.
+
+        :return: Tool names of the analyses received
+        """
+        if len(shared_context) != 1:
+            return set()
+        by_name = {agent.tool_name: agent for agent in agents}
+        sections, cache_keys = {}, {}
+        for agent in agents:
+            section = agent.fused_section(inventory)
+            if section is None:
+                continue
+            if agent.cache is not None:
+                cache_keys[agent.tool_name] = agent.fused_cache_key(inventory)
+                with span("cache_lookup", agent=agent.tool_name) as lookup:
+                    hit = agent.cache.get(cache_keys[agent.tool_name]) is not None
+                    lookup.set(hit=hit)
+                if hit:
+                    continue  # the agent answers from its cache itself
+            sections[agent.tool_name] = section
+        if not sections:
+            return set()
+        instruction = FUSED_INSTRUCTION + "".join(f"\n\n## {name}\n\n{section}" for name, section in sections.items())
+        messages = shared_context.build_messages(0, self.system_prompt or FUSED_SYSTEM_PROMPT, instruction)
+        max_prompt_tokens = self.agent_options.get("max_prompt_tokens", 100000)
+        if estimate_tokens(json.dumps(messages) + json.dumps(shared_context.tools)) > max_prompt_tokens:
+            print("⚠️ The codebase and all instructions exceed MAX_PROMPT_TOKENS; running the agents separately")
+            return set()
+
+        model = agents[0].model
+        attributes = {"agent": "fused", "model": model, "tools": len(sections)}
+        if telemetry_enabled():
+            attributes["bytes_sent"] = len(json.dumps({"messages": messages, "tools": shared_context.tools}).encode("utf-8"))
+        try:
+            with span("model_request", **attributes) as request:
+                response = create_completion(
+                    self.agent_options.get("client") or self.client,
+                    estimated_tokens=sum(len(message["content"]) for message in messages) // 4
+                    + sum(by_name[name].expected_completion_tokens for name in sections),
+                    model=model,
+                    messages=messages,
+                    tools=shared_context.tools,
+                    tool_choice="required",
+                )
+                usage = getattr(response, "usage", None)
+                record_usage(request, usage)
+                shared_context.record_usage(usage)
+        except Exception as e:
+            print(f"❌ Fused analysis request failed, running the agents separately: {e}")
+            return set()
+
+        received = set()
+        with span("parse", agent="fused") as parse:
+            for tool_call in response.choices[0].message.tool_calls or ():
+                name = tool_call.function.name
+                if name not in sections or name in received:
+                    continue
+                agent = by_name[name]
+                try:
+                    agent.fused_result = agent.analysis_model.parse_raw(tool_call.function.arguments)
+                except ValueError as e:
+                    print(f"❌ Invalid {name} call in the fused response: {e}")
+                    continue
+                if name in cache_keys:
+                    agent.cache.put(cache_keys[name], name, agent.fused_result.json())
+                received.add(name)
+            parse.set(received=len(received))
+        missing = sorted(set(sections) - received)
+        if missing:
+            print(f"⚠️ Fused response lacks {', '.join(missing)}; asking those agents separately")
+        return received
+
+    def run_agents(self, agents, inventory):
+        """
+        Run the agents on a thread pool and keep whatever finishes in time.
+
+        :param agents: A dictionary mapping report keys to agent analyze methods
+        :param inventory: The FileInventory shared by all agents
+        :return: A tuple of (agent_outputs, agent_errors); failed or timed out agents only appear in agent_errors
+        """
+        agent_outputs = {}
+        agent_errors = {}
+        started = {}
+
+        def run(key, analyze):
+            started[key] = time.monotonic()
+            with span("agent", report=key):
+                return analyze(inventory)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="butterfly-agent")
+        pending = {executor.submit(propagate(run), key, analyze): key for key, analyze in agents.items()}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=self._next_deadline(pending, started), return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        agent_outputs[key] = future.result()
+                    except Exception as e:
+                        print(f"Error during {key}: {str(e)}")
+                        agent_errors[key] = str(e)
+
+                if self.agent_timeout is None:
+                    continue
+                now = time.monotonic()
+                for future, key in list(pending.items()):
+                    if key in started and now - started[key] >= self.agent_timeout:
+                        print(f"Timed out waiting for {key} after {self.agent_timeout}s")
+                        agent_errors[key] = f"Timed out after {self.agent_timeout}s"
+                        del pending[future]
+        finally:
+            # Timed out agents finish on their own thread; nobody waits for them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return agent_outputs, agent_errors
+
+    def _next_deadline(self, pending, started):
+        if self.agent_timeout is None:
+            return None
+        now = time.monotonic()
+        remaining = [started[key] + self.agent_timeout - now for key in pending.values() if key in started]
+        # Agents still queued behind the concurrency limit have no deadline yet, so keep polling
+        if len(remaining) < len(pending):
+            remaining.append(0.1)
+        return max(0, min(remaining))
 
     def main(self):
         report = self.analyze_codebase()
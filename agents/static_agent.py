@@ -1,19 +1,11 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
 import fnmatch
-from utils.config_manager import root as get_project_root
 from pydantic import BaseModel
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Load the system prompt from .env
-STATIC_SYS_PROMPT = os.getenv("STATIC_SYS_PROMPT")
+from .base_agent import BaseAgent
+from utils.analysis_merge import dedupe_items
+from utils.local_analysis import LOCAL_FIELDS, DEFAULT_COMPLEXITY_THRESHOLD, run_local_analysis
+from utils.skeleton import python_skeleton
+from utils.telemetry import span
 
 class StaticAnalysis(BaseModel):
     syntaxErrors: list[str]
@@ -28,43 +20,62 @@ class StaticAnalysis(BaseModel):
     overallCodeHealth: str
     keyRecommendations: list[str]
 
-class StaticAgent:
-    def __init__(self):
-        self.client = client
-        self.system_prompt = STATIC_SYS_PROMPT
-
-    def analyze_static_code(self, file_paths, file_contents):
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "report_static_analysis",
-                    "description": "Report the static code analysis results of the codebase",
-                    "parameters": StaticAnalysis.schema(),
-                }
-            }
-        ]
-
-        content = "\n\n".join([f"File: {path}\n\nContent:\n{content}" for path, content in zip(file_paths, file_contents)])
-
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"Perform static code analysis on the following codebase:\n\n{content}"}
-        ]
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
+class StaticAgent(BaseAgent):
+    analysis_model = StaticAnalysis
+    tool_name = "report_static_analysis"
+    tool_description = "Report the static code analysis results of the codebase"
+    system_prompt_env = "STATIC_SYS_PROMPT"
+    complexity_threshold = DEFAULT_COMPLEXITY_THRESHOLD
+    local_analysis_workers = None
+    # "skeleton" sends the model only the structure of Python files (the local pass still reads them in full);
+    # cheaper, but bugs, security issues and runtime errors inside function bodies go unseen
+    python_content_mode = "full"
+
+    @property
+    def instruction(self):
+        skeletons = self.python_content_mode == "skeleton" and self.shared_context is None
+        return (
+            "Perform static code analysis on the following codebase. "
+            "Syntax errors, unused code, cyclomatic complexity and bare excepts of Python files have already been "
+            "computed locally"
+            + (", and Python files are given as skeletons (imports, signatures, docstrings and calls)" if skeletons else "")
+            + "; report those categories only for other languages and focus on bugs, security, runtime errors, "
+            "smells and design:"
         )
 
-        if response.choices[0].message.tool_calls:
-            tool_call = response.choices[0].message.tool_calls[0]
-            if tool_call.function.name == "report_static_analysis":
-                return StaticAnalysis.parse_raw(tool_call.function.arguments)
-
-        return None
+    def analyze_static_code(self, file_paths, file_contents):
+        return self.request_analysis(file_paths, file_contents)
+
+    def request_analysis(self, file_paths, file_contents):
+        """
+        Combine the deterministic local pass over the Python files with the model's semantic analysis.
+
+        With ``python_content_mode`` "skeleton", Python files are sent to the
+        model as skeletons (files that do not parse as they are). A shared
+        codebase prompt is always sent unchanged.
+        """
+        with span("local_analysis", agent=self.tool_name, files=len(file_paths)):
+            local = run_local_analysis(
+                file_paths, file_contents, self.local_analysis_workers, self.complexity_threshold
+            )
+        if self.python_content_mode == "skeleton" and self.shared_context is None:
+            file_contents = [
+                (python_skeleton(content) if path.endswith(".py") else None) or content
+                for path, content in zip(file_paths, file_contents)
+            ]
+        result = super().request_analysis(file_paths, file_contents)
+        if result is None:
+            if not any(local.values()):
+                return None
+            result = StaticAnalysis.parse_obj({
+                **{field: [] for field in StaticAnalysis.__fields__ if field != "overallCodeHealth"},
+                "overallCodeHealth": "Unknown (model analysis unavailable)",
+            })
+
+        merged = result.dict()
+        for field in LOCAL_FIELDS:
+            merged[field] = dedupe_items(local[field] + merged[field])
+        return StaticAnalysis.parse_obj(merged)
 
     def should_analyze_file(self, file_path):
         patterns_to_analyze = [
@@ -80,26 +91,8 @@ class StaticAgent:
 
         return any(fnmatch.fnmatch(file_path, pattern) for pattern in patterns_to_analyze)
 
-    def analyze_codebase_static(self):
-        project_root = get_project_root()
-        if not project_root:
-            raise FileNotFoundError("butterfly.config.py not found in this or any parent directory")
-
-        file_paths = []
-        file_contents = []
-        for root_dir, _, files in os.walk(project_root):
-            for file in files:
-                file_path = os.path.join(root_dir, file)
-                if self.should_analyze_file(file_path):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            file_content = f.read()
-                        file_paths.append(file_path)
-                        file_contents.append(file_content)
-                    except Exception as e:
-                        print(f"Error reading file {file_path}: {str(e)}")
-
-        return self.analyze_static_code(file_paths, file_contents)
+    def analyze_codebase_static(self, inventory=None):
+        return self.analyze_codebase(inventory)
 
 def main():
     agent = StaticAgent()
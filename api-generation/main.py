@@ -1,14 +1,19 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 import os
+import asyncio
 import logging
 import socket
+from contextlib import asynccontextmanager
 
-from .utils.db_utils import create_tables, get_user, insert_user, delete_user
-from .utils.auth_utils import authenticate_user  # type: ignore
+from .utils.db_utils import create_tables, get_user, insert_user, delete_user, init_pool, close_pool, run_in_db_thread, user_cache
+from .utils.auth_utils import authenticate_user_async  # type: ignore
 from .utils.rate_limit_utils import RateLimiter
 from .utils.cors_utils import CORSConfig
+from .utils.auth_utils import get_current_user
+from .utils.job_queue import JobQueue, JobRunner, resolve_project, validate_options
 
 # Configure logging
 logging.basicConfig(
@@ -27,11 +32,17 @@ def find_open_port(start_port=3000, end_port=4000):
     raise RuntimeError("No available ports found")
 
 # Use lifespan for startup and shutdown events
+@asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Backend is starting...")
-    create_tables()  # Ensure tables are created on startup
+    pool = init_pool()  # Open the shared connection pool once for the app's lifetime
+    await pool.run(create_tables)  # Ensure tables are created on startup
+    app.state.job_queue = await pool.run(JobQueue)
+    app.state.job_runner = JobRunner(app.state.job_queue).start()
     yield
     logger.info("🛑 Backend is shutting down...")
+    app.state.job_runner.stop()
+    close_pool()
 
 app = FastAPI(lifespan=lifespan)  # Pass lifespan to the FastAPI app
 
@@ -49,6 +60,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 class APIKey(BaseModel):
     api_key: str
 
+# Pydantic model for an analysis job
+class JobRequest(BaseModel):
+    project_path: str
+    options: dict = {}
+
 @app.get("/")
 async def root():
     logger.info("🌍 Root endpoint accessed")
@@ -56,22 +72,22 @@ async def root():
 
 @app.post("/api_key")
 async def create_api_key(api_key: str = Query(...)):  # Use Query to require the api_key
-    if get_user(api_key):
+    if await run_in_db_thread(get_user, api_key):
         logger.error("❌ API key already exists.")
         raise HTTPException(status_code=400, detail="API key already exists.")
-    insert_user(api_key)  # Insert the API key into the database
+    await run_in_db_thread(insert_user, api_key)  # Insert the API key into the database
     logger.info(f"✅ API key {api_key} created successfully.")
     return {"message": "API key created successfully."}
 
 @app.delete("/api_key")
 async def delete_api_key(api_key: str = Query(...)):
-    delete_user(api_key)
+    await run_in_db_thread(delete_user, api_key)
     logger.info(f"✅ API key {api_key} deleted successfully.")
     return {"message": "API key deleted successfully."}
 
 @app.get("/authenticate")
 async def authenticate(api_key: str = Depends(oauth2_scheme)):
-    keys = authenticate_user(api_key)
+    keys = await authenticate_user_async(api_key)
     if keys:
         logger.info("✅ API key authenticated successfully.")
         return {"message": "API key is valid"}
@@ -79,6 +95,84 @@ async def authenticate(api_key: str = Depends(oauth2_scheme)):
         logger.error("❌ API key authentication failed.")
         raise HTTPException(status_code=401, detail="Invalid API key")
 
+@app.get("/metrics/auth_cache")
+async def auth_cache_metrics():
+    return user_cache.stats()
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, user=Depends(get_current_user)):
+    # The project's butterfly.config.py is executed by the worker, so only allowed directories are accepted
+    project = resolve_project(request.project_path)
+    if project is None:
+        raise HTTPException(status_code=403, detail="project_path is not within the server's JOB_PROJECT_ROOTS")
+    if not os.path.isfile(os.path.join(project, 'butterfly.config.py')):
+        raise HTTPException(status_code=400, detail=f"butterfly.config.py not found in {project}")
+    errors = validate_options(request.options)
+    if errors:
+        raise HTTPException(status_code=400, detail=f"Invalid options: {'; '.join(errors)}")
+    job = await run_in_db_thread(app.state.job_queue.submit, project, request.options)
+    app.state.job_runner.notify()
+    logger.info(f"📥 Job {job['id']} queued for {project}")
+    return job
+
+@app.get("/jobs")
+async def list_jobs(status: str = None, project: str = None, limit: int = Query(100, le=1000), user=Depends(get_current_user)):
+    return await run_in_db_thread(app.state.job_queue.list, status, project and os.path.realpath(project), limit)
+
+@app.get("/jobs/stats")
+async def job_stats(user=Depends(get_current_user)):
+    runner = app.state.job_runner
+    counts = await run_in_db_thread(app.state.job_queue.counts)
+    return {"workers": runner.workers, "executor": runner.executor_kind, "running": runner.running(), "jobs": counts}
+
+async def find_job(job_id):
+    job = await run_in_db_thread(app.state.job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int, user=Depends(get_current_user)):
+    return await find_job(job_id)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: int, user=Depends(get_current_user)):
+    job = await find_job(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return await run_in_db_thread(app.state.job_queue.result, job_id)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: int, user=Depends(get_current_user)):
+    job = await find_job(job_id)
+    if not await run_in_db_thread(app.state.job_queue.cancel, job_id):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {"message": "Job cancelled."}
+
+def read_run_metrics(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition: Butterfly's per-stage run metrics plus this app's auth cache."""
+    # Written by the CLI's PrometheusSink (TELEMETRY includes 'prometheus')
+    run_metrics = await asyncio.to_thread(read_run_metrics, os.getenv("BUTTERFLY_METRICS_PATH", "metrics.prom"))
+    stats = user_cache.stats()
+    lines = [
+        "# HELP butterfly_auth_cache_entries Entries in the API key cache",
+        "# TYPE butterfly_auth_cache_entries gauge",
+        f"butterfly_auth_cache_entries {stats['size']}",
+        "# HELP butterfly_auth_cache_lookups_total API key cache lookups",
+        "# TYPE butterfly_auth_cache_lookups_total counter",
+        f'butterfly_auth_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'butterfly_auth_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+    ]
+    return PlainTextResponse(run_metrics + "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     host = os.getenv("API_HOST", "0.0.0.0")
@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from .db_utils import get_user
+from .db_utils import get_user, get_cached_user, fetch_user, run_in_db_thread
+from .cache_utils import MISSING
 from pydantic import BaseModel 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -16,8 +17,20 @@ def authenticate_user(api_key: str):
     return keys
 
 
+async def authenticate_user_async(api_key: str):
+    """Answer from the in-process key cache when possible, else look the key up on a database thread."""
+    keys = get_cached_user(api_key)
+    if keys is MISSING:
+        keys = await run_in_db_thread(fetch_user, api_key)
+    if not keys:
+        return False
+    return keys
+
+
 async def get_current_user(api_key: str = Depends(oauth2_scheme)):
-    keys = get_user(api_key)
+    keys = get_cached_user(api_key)
+    if keys is MISSING:
+        keys = await run_in_db_thread(fetch_user, api_key)
     if keys is None:
         raise HTTPException(status_code=401, detail="API key not found")
     return keys
@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a time-to-live.
+
+    Negative results (``None``) can be given a shorter TTL so a key created
+    by another process becomes valid quickly. ``invalidate`` bumps an epoch;
+    a value loaded before the bump is discarded by ``put`` so a lookup racing
+    with a delete cannot re-insert a stale entry.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60.0, negative_ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.epoch = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or MISSING."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value, epoch=None):
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self.epoch += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
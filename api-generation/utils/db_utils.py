@@ -1,56 +1,148 @@
 import os
 import sqlite3
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .cache_utils import TTLCache, MISSING
 
 DATABASE_PATH = os.getenv('DATABASE_PATH')
+DB_WORKERS = int(os.getenv('DB_WORKERS', '4'))
+
+# Positive and negative API key lookups; entries are dropped explicitly on insert/delete
+user_cache = TTLCache(
+    maxsize=int(os.getenv('AUTH_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('AUTH_CACHE_TTL', '60')),
+    negative_ttl=float(os.getenv('AUTH_CACHE_NEGATIVE_TTL', '5')),
+)
+
+# sqlite3 keeps a per-connection cache of prepared statements keyed on the SQL text
+SELECT_USER_SQL = 'SELECT api_key FROM api_keys WHERE api_key = ?'
+INSERT_USER_SQL = 'INSERT INTO api_keys (api_key) VALUES (?)'
+DELETE_USER_SQL = 'DELETE FROM api_keys WHERE api_key = ?'
+
+
+class ConnectionPool:
+    """
+    One long-lived WAL-mode connection per thread, plus a small worker pool.
+
+    Async handlers hand their queries to ``run`` so SQLite work happens on
+    the worker threads instead of blocking the event loop; each worker
+    reuses its own connection and prepared statements across requests.
+    """
+
+    def __init__(self, database_path, max_workers=DB_WORKERS):
+        self.database_path = database_path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database_path, cached_statements=256, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, func, *args, **kwargs):
+        """Run ``func`` on a database worker thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_pool(database_path=None, max_workers=DB_WORKERS):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(database_path or DATABASE_PATH, max_workers)
+    return _pool
+
+
+def get_pool():
+    return _pool or init_pool()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    return await get_pool().run(func, *args, **kwargs)
 
 
 def create_tables():
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS api_keys
-    (api_key TEXT PRIMARY KEY)
-    ''')
-    conn.commit()
-    conn.close()
+    conn = get_pool().connection()
+    with conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS api_keys
+        (api_key TEXT PRIMARY KEY)
+        ''')
+
+
+def get_cached_user(api_key: str):
+    """Return the cached lookup for ``api_key`` without touching the database, or MISSING."""
+    return user_cache.get(api_key)
+
+
+def fetch_user(api_key: str):
+    """Look ``api_key`` up in the database and remember the answer in ``user_cache``."""
+    epoch = user_cache.epoch
+    result = get_pool().connection().execute(SELECT_USER_SQL, (api_key,)).fetchone()
+    user = {"api_key": result[0]} if result else None  # Return a dictionary
+    user_cache.put(api_key, user, epoch)
+    return user
 
 
 def get_user(api_key: str):
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT api_key FROM api_keys WHERE api_key = ?', (api_key,))
-    result = cursor.fetchone()
-    conn.close()
-    if result:
-        return {"api_key": result[0]}  # Return a dictionary
+    cached = user_cache.get(api_key)
+    if cached is not MISSING:
+        return cached
+    return fetch_user(api_key)
 
 
 def insert_user(api_key: str):
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = get_pool().connection()
     try:
-        cursor.execute('INSERT INTO api_keys (api_key) VALUES (?)', (api_key,))
-        conn.commit()
+        with conn:
+            conn.execute(INSERT_USER_SQL, (api_key,))
+        user_cache.invalidate(api_key)
         print("✅ API key inserted successfully.")
     except sqlite3.IntegrityError:
         print("❌ API key already exists.")
     except Exception as e:
         print(f"❌ Failed to insert API key: {e}")
-    finally:
-        conn.close()
 
 
 def delete_user(api_key: str):
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = get_pool().connection()
     try:
-        cursor.execute('DELETE FROM api_keys WHERE api_key = ?', (api_key,))
+        with conn:
+            cursor = conn.execute(DELETE_USER_SQL, (api_key,))
+        user_cache.invalidate(api_key)
         if cursor.rowcount == 0:
             print("❌ API key does not exist.")
         else:
-            conn.commit()
             print("✅ API key deleted successfully.")
     except Exception as e:
         print(f"❌ Failed to delete API key: {e}")
-    finally:
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,372 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+JOBS_DATABASE_PATH = os.getenv('JOBS_DATABASE_PATH', 'jobs.db')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', str(os.cpu_count() or 2)))
+JOB_EXECUTOR = os.getenv('JOB_EXECUTOR', 'process')  # 'process' or 'thread'
+JOB_MAX_PER_PROJECT = int(os.getenv('JOB_MAX_PER_PROJECT', '1'))
+# Model API quota shared by all workers (unset for no client-side limit)
+RATE_LIMIT_RPM = float(os.getenv('RATE_LIMIT_RPM', '0')) or None
+RATE_LIMIT_TPM = float(os.getenv('RATE_LIMIT_TPM', '0')) or None
+
+# Directories whose projects may be analysed (os.pathsep-separated); jobs are refused while unset
+JOB_PROJECT_ROOTS = [os.path.realpath(path) for path in os.getenv('JOB_PROJECT_ROOTS', '').split(os.pathsep) if path]
+
+CONTENT_MODES = ('full', 'skeleton')
+
+# butterfly.config.py settings a submitted job may override: accepted types, value check, description
+JOB_OPTIONS = {
+    'MAX_CONCURRENT_AGENTS': (int, lambda value: value >= 1, "a positive integer"),
+    'AGENT_TIMEOUT': ((int, float, type(None)), lambda value: value is None or value > 0, "a positive number of seconds or null"),
+    'INCREMENTAL': (bool, None, "a boolean"),
+    'INCREMENTAL_DEPENDENTS': (int, lambda value: value >= 0, "a non-negative integer"),
+    'MAX_PROMPT_TOKENS': (int, lambda value: value >= 1, "a positive integer"),
+    'BATCH_WORKERS': (int, lambda value: value >= 1, "a positive integer"),
+    'CONTENT_MODES': (
+        dict, lambda value: all(isinstance(key, str) and mode in CONTENT_MODES for key, mode in value.items()),
+        'an object mapping report keys to "full" or "skeleton"',
+    ),
+    'MAX_FILE_BYTES': (int, lambda value: value >= 1, "a positive integer"),
+}
+
+# The repository root, holding the agents and utils packages the workers import
+BUTTERFLY_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = 'id, project, options, status, attempts, error, created_at, started_at, finished_at'
+
+# Fair claim: queued jobs of projects below their concurrency cap, projects with
+# the fewest running jobs first, then the project served longest ago, then FIFO
+CLAIM_JOB_SQL = f'''
+SELECT {JOB_COLUMNS} FROM jobs AS j
+WHERE j.status = 'queued'
+  AND (SELECT COUNT(*) FROM jobs AS r WHERE r.project = j.project AND r.status = 'running') < ?
+ORDER BY
+  (SELECT COUNT(*) FROM jobs AS r WHERE r.project = j.project AND r.status = 'running'),
+  COALESCE((SELECT MAX(s.started_at) FROM jobs AS s WHERE s.project = j.project), 0),
+  j.id
+LIMIT 1
+'''
+
+
+def _default(obj):
+    # Agent results are pydantic models
+    if hasattr(obj, 'dict'):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS.split(', '), row))
+    job['options'] = json.loads(job['options'])
+    return job
+
+
+class JobQueue:
+    """
+    Persistent SQLite queue of analysis jobs.
+
+    A job moves from ``queued`` to ``running`` to ``done`` or ``failed``
+    (or is ``cancelled`` while still queued). Submitting a project that
+    already has an identical job queued returns that job instead of adding
+    another one. Jobs left ``running`` by a crashed server are queued again
+    by ``recover``.
+    """
+
+    def __init__(self, database_path=JOBS_DATABASE_PATH):
+        self.database_path = database_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        conn = self.connection()
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project TEXT NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_project ON jobs (status, project)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_project_started ON jobs (project, started_at)')
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def submit(self, project, options=None):
+        """Queue an analysis of ``project``; returns the job (an existing identical queued job if there is one)."""
+        options = json.dumps(options or {}, sort_keys=True)
+        conn = self.connection()
+        with self._lock, conn:
+            row = conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE project = ? AND options = ? AND status = 'queued'",
+                (project, options)
+            ).fetchone()
+            if row is not None:
+                return _job(row)
+            cursor = conn.execute(
+                "INSERT INTO jobs (project, options, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (project, options, time.time())
+            )
+        return self.get(cursor.lastrowid)
+
+    def claim(self, max_per_project=JOB_MAX_PER_PROJECT):
+        """Mark the next job to run as ``running`` and return it, or None if nothing may run now."""
+        conn = self.connection()
+        with self._lock, conn:
+            job = _job(conn.execute(CLAIM_JOB_SQL, (max_per_project,)).fetchone())
+            if job is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (now, job['id'])
+            )
+        job.update(status='running', started_at=now, attempts=job['attempts'] + 1)
+        return job
+
+    def complete(self, job_id, result):
+        with self._lock, self.connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? WHERE id = ?",
+                (json.dumps(result, default=_default), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with self._lock, self.connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def cancel(self, job_id):
+        """Cancel a queued job; returns False if it is no longer queued."""
+        with self._lock, self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+        return cursor.rowcount > 0
+
+    def recover(self):
+        """Queue jobs again that were running when the server stopped; returns how many."""
+        with self._lock, self.connection() as conn:
+            cursor = conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        return cursor.rowcount
+
+    def get(self, job_id):
+        return _job(self.connection().execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def result(self, job_id):
+        row = self.connection().execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def list(self, status=None, project=None, limit=100):
+        query = f"SELECT {JOB_COLUMNS} FROM jobs"
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if project:
+            clauses.append("project = ?")
+            params.append(project)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC LIMIT ?"
+        return [_job(row) for row in self.connection().execute(query, (*params, limit)).fetchall()]
+
+    def counts(self):
+        return dict(self.connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def _init_worker(requests_per_minute, tokens_per_minute):
+    """Set up a worker's share of the model API quota."""
+    if BUTTERFLY_ROOT not in sys.path:
+        sys.path.append(BUTTERFLY_ROOT)
+    from utils.openai_client import configure_transport
+
+    configure_transport(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+
+
+def resolve_project(project_path, roots=None):
+    """The real path of ``project_path`` if it lies within one of ``roots`` (default JOB_PROJECT_ROOTS), else None."""
+    project = os.path.realpath(project_path)
+    for root in JOB_PROJECT_ROOTS if roots is None else roots:
+        if os.path.commonpath([project, root]) == root:
+            return project
+    return None
+
+
+def validate_options(options):
+    """Why ``options`` cannot be applied to a job, as a list of messages (empty when they can)."""
+    errors = []
+    for name, value in options.items():
+        if name not in JOB_OPTIONS:
+            errors.append(f"{name} is not supported")
+            continue
+        types, check, description = JOB_OPTIONS[name]
+        # bool is an int, but True is no worker count
+        valid = isinstance(value, types) and (types is bool or not isinstance(value, bool))
+        if valid and check is not None:
+            valid = check(value)
+        if not valid:
+            errors.append(f"{name} must be {description}")
+    return errors
+
+
+def run_analysis_job(project, options):
+    """
+    Analyse ``project`` with a ManagerAgent configured by its butterfly.config.py and ``options``.
+
+    The report is appended to the project's history and findings database,
+    as a CLI run would, and returned.
+    """
+    if BUTTERFLY_ROOT not in sys.path:
+        sys.path.append(BUTTERFLY_ROOT)
+    from agents.manager_agent import ManagerAgent
+    from utils.config_manager import load_config
+    from utils.scanner import scan_project
+    from utils.history_store import open_history, DEFAULT_HISTORY_PATH
+    from utils.findings_store import FindingsStore, DEFAULT_FINDINGS_DB
+
+    config = {**load_config(project), **options}
+    manager_agent = ManagerAgent.from_config(config, base_dir=project)
+    report = manager_agent.analyze_codebase(scan_project(project))
+
+    history = open_history(os.path.join(project, config.get('HISTORY_PATH', DEFAULT_HISTORY_PATH)), legacy_json_path=None)
+    history.append(report)
+    findings = FindingsStore(os.path.join(project, config.get('FINDINGS_DB', DEFAULT_FINDINGS_DB)), project_root=project)
+    findings.record_run(report, manager_agent.inventory)
+    findings.close()
+    return report
+
+
+class JobRunner:
+    """
+    Runs queued jobs on a pool of ``workers``.
+
+    A dispatcher thread claims jobs fairly across projects whenever a worker
+    is free. With the ``process`` executor analyses run in separate (spawned)
+    processes and scale with cores; the model API rate limits are then
+    divided evenly between the workers. The ``thread`` executor shares one
+    process and one rate limiter.
+    """
+
+    def __init__(self, queue, workers=JOB_WORKERS, executor=JOB_EXECUTOR, max_per_project=JOB_MAX_PER_PROJECT,
+                 requests_per_minute=RATE_LIMIT_RPM, tokens_per_minute=RATE_LIMIT_TPM, poll_interval=5.0,
+                 job_function=run_analysis_job):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.executor_kind = executor
+        self.max_per_project = max(1, max_per_project)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.poll_interval = poll_interval
+        self.job_function = job_function
+        self._executor = None
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _create_executor(self):
+        if self.executor_kind == 'thread':
+            _init_worker(self.requests_per_minute, self.tokens_per_minute)
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="butterfly-job")
+        share = lambda limit: limit / self.workers if limit else None
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(share(self.requests_per_minute), share(self.tokens_per_minute)),
+        )
+
+    def start(self):
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"🔁 Re-queued {recovered} job(s) interrupted by the last shutdown")
+        self._executor = self._create_executor()
+        self._thread = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """Wake the dispatcher, e.g. after a job was submitted."""
+        self._wake.set()
+
+    def running(self):
+        with self._lock:
+            return sorted(self._running.values())
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            with self._lock:
+                free = self.workers - len(self._running)
+            job = self.queue.claim(self.max_per_project) if free > 0 else None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            logger.info(f"🚀 Starting job {job['id']} for {job['project']}")
+            try:
+                future = self._submit(job)
+            except Exception as e:
+                # The job is already marked running; fail it rather than leave it stuck until a restart
+                self.queue.fail(job['id'], f"{type(e).__name__}: {e}")
+                logger.error(f"❌ Job {job['id']} could not be started: {e}")
+                continue
+            with self._lock:
+                self._running[future] = job['id']
+            future.add_done_callback(self._finished)
+
+    def _submit(self, job):
+        try:
+            return self._executor.submit(self.job_function, job['project'], job['options'])
+        except BrokenProcessPool:
+            self._executor = self._create_executor()
+            return self._executor.submit(self.job_function, job['project'], job['options'])
+
+    def _finished(self, future):
+        with self._lock:
+            job_id = self._running.pop(future)
+        if future.cancelled():
+            return  # abandoned by stop(); still marked running, so re-queued on the next start
+        try:
+            self.queue.complete(job_id, future.result())
+            logger.info(f"✅ Job {job_id} finished")
+        except Exception as e:
+            self.queue.fail(job_id, f"{type(e).__name__}: {e}")
+            logger.error(f"❌ Job {job_id} failed: {e}")
+        self._wake.set()
+
+    def stop(self, wait=False):
+        """Stop dispatching; running jobs are abandoned (and re-queued on the next start) unless ``wait``."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
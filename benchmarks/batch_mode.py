@@ -0,0 +1,67 @@
+"""
+Batch-mode check for ManagerAgent.
+
+Runs one shared-prefix manager run through a BatchClient against the local
+mock OpenAI server and counts the batches it submitted. All agents of a run
+must end up in a single batch; it exits non-zero otherwise, so it can guard
+against regressions in CI:
+
+    python benchmarks/batch_mode.py --files 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_repo import DEFAULT_MIX, generate_repo
+from benchmarks.mock_openai_server import MockOpenAIServer
+from utils.scanner import scan_project
+from utils.openai_client import configure_transport
+from utils.batch_client import BatchClient
+from agents.manager_agent import ManagerAgent
+
+
+def run(files, collect_window, seed=0):
+    """Analyze a synthetic repository of ``files`` files in batch mode; return the submitted batches."""
+    server = MockOpenAIServer(batch_delay=0.2).start()
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    configure_transport(max_retries=0)
+    try:
+        with tempfile.TemporaryDirectory(prefix='butterfly-batch-') as tmp:
+            generate_repo(tmp, files, DEFAULT_MIX, 40, seed)
+            client = BatchClient(collect_window=collect_window, poll_interval=0.1)
+            manager = ManagerAgent(shared_prefix=True, client=client)
+            start = time.perf_counter()
+            report = manager.analyze_codebase(scan_project(tmp))
+            elapsed = time.perf_counter() - start
+        return {
+            'batches': len(server.batches),
+            'requests': sum(batch['request_counts']['total'] for batch in server.batches.values()),
+            'analyses': sorted(key for key, value in report.items() if value is not None),
+            'seconds': round(elapsed, 2),
+        }
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--collect-window', type=float, default=0.5)
+    args = parser.parse_args()
+
+    result = run(args.files, args.collect_window)
+    print(json.dumps(result, indent=2))
+    if result['batches'] != 1:
+        print(f"❌ One manager run submitted {result['batches']} batches instead of 1", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Import-time benchmark for the CLI entry points.
+
+Imports each module in a fresh interpreter several times and reports the
+median wall time. It exits non-zero when a module goes over its budget or
+pulls in one of the modules that must only load on first use (the OpenAI
+client stack, dotenv, the tokenizer), so it can guard against regressions
+in CI:
+
+    python benchmarks/import_time.py --budget-ms 400
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['agents.manager_agent', 'butterfly']
+DEFERRED_MODULES = ['openai', 'httpx', 'dotenv', 'tiktoken', 'requests']
+
+_PROBE = '''
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+'''
+
+
+def measure(module, runs=5):
+    """Import ``module`` in ``runs`` fresh interpreters; return timings and eagerly loaded modules."""
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(timings) * 1000, 1),
+        'min_ms': round(min(timings) * 1000, 1),
+        'eagerly_loaded': sorted(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None, help="Fail when a median import takes longer")
+    args = parser.parse_args()
+
+    failed = False
+    results = []
+    for module in args.modules:
+        try:
+            result = measure(module, args.runs)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            failed = True
+            continue
+        if result['eagerly_loaded']:
+            print(f"❌ {module} imports {', '.join(result['eagerly_loaded'])} at import time", file=sys.stderr)
+            failed = True
+        if args.budget_ms is not None and result['median_ms'] > args.budget_ms:
+            print(f"❌ {module} took {result['median_ms']} ms (budget {args.budget_ms} ms)", file=sys.stderr)
+            failed = True
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+A local stand-in for the OpenAI chat completions API.
+
+Every request is answered, after a configurable delay, with a tool call to
+the tool forced by ``tool_choice`` (or else the first offered one) whose
+arguments are synthesized from the tool's JSON schema, so the agents'
+pydantic parsing runs exactly as against the real API. Streaming (``stream: true``) is answered with server-sent events.
+Prompt caching is simulated: the longest prefix (tools, then whole
+messages) of at least 1024 tokens seen in an earlier request is reported
+as ``cached_tokens``.
+
+The files and batches endpoints are emulated too: an uploaded JSONL batch
+is answered line by line the same way, ``batch_delay`` seconds after it
+was created.
+
+    python benchmarks/mock_openai_server.py --port 8765 --latency 0.5
+"""
+import json
+import time
+import random
+import hashlib
+import itertools
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def sample_from_schema(schema, definitions=None):
+    """A small valid instance of a JSON schema (as produced by pydantic's ``.schema()``)."""
+    definitions = definitions or schema.get('definitions') or schema.get('$defs') or {}
+    if '$ref' in schema:
+        return sample_from_schema(definitions[schema['$ref'].rsplit('/', 1)[-1]], definitions)
+    for key in ('anyOf', 'allOf', 'oneOf'):
+        if key in schema:
+            return sample_from_schema(schema[key][0], definitions)
+    kind = schema.get('type')
+    if kind == 'object' or 'properties' in schema:
+        return {name: sample_from_schema(prop, definitions) for name, prop in schema.get('properties', {}).items()}
+    if kind == 'array':
+        item = schema.get('items', {'type': 'string'})
+        return [sample_from_schema(item, definitions) for _ in range(2)]
+    if kind == 'integer':
+        return 1
+    if kind == 'number':
+        return 1.0
+    if kind == 'boolean':
+        return False
+    if kind == 'string':
+        return 'synthetic finding'
+    return {}
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.prompt_bytes = 0
+
+    def record(self, prompt_bytes):
+        with self.lock:
+            self.requests += 1
+            self.prompt_bytes += prompt_bytes
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _not_found(self):
+        self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+    def do_GET(self):
+        parts = self.path.rstrip('/').split('/')
+        server = self.server
+        if len(parts) >= 3 and parts[-3] == 'files' and parts[-1] == 'content' and parts[-2] in server.files:
+            content = server.files[parts[-2]]['content']
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        elif len(parts) >= 2 and parts[-2] == 'files' and parts[-1] in server.files:
+            self._send_json(200, server.files[parts[-1]]['object'])
+        elif len(parts) >= 2 and parts[-2] == 'batches' and parts[-1] in server.batches:
+            self._send_json(200, server.batch_status(parts[-1]))
+        else:
+            self._not_found()
+
+    def do_DELETE(self):
+        parts = self.path.rstrip('/').split('/')
+        with self.server._lock:
+            deleted = len(parts) >= 2 and parts[-2] == 'files' and self.server.files.pop(parts[-1], None) is not None
+        if deleted:
+            self._send_json(200, {'id': parts[-1], 'object': 'file', 'deleted': True})
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        path = self.path.rstrip('/')
+        if path.endswith('/files'):
+            self._send_json(200, self.server.add_file(*self._read_upload()))
+            return
+        if path.endswith('/batches'):
+            request = json.loads(self._read_body())
+            if request.get('input_file_id') not in self.server.files:
+                self._send_json(400, {'error': {'message': 'Unknown input_file_id'}})
+                return
+            self._send_json(200, self.server.add_batch(request))
+            return
+        if not path.endswith('/chat/completions'):
+            self._not_found()
+            return
+        body = self._read_body()
+        request = json.loads(body)
+        server = self.server
+        server.stats.record(len(body))
+
+        prompt_tokens = count_prompt_tokens(request)
+        time.sleep(server.latency + random.uniform(0, server.jitter) + server.seconds_per_1k_tokens * prompt_tokens / 1000)
+        response = completion_for(request, prompt_tokens, server.cached_tokens(request))
+        if request.get('stream'):
+            self._stream(response)
+        else:
+            self._send_json(200, response)
+
+    def _read_upload(self):
+        """The (purpose, filename, content) of a multipart file upload."""
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8') + self._read_body()
+        )
+        fields = {}
+        for part in message.iter_parts():
+            fields[part.get_param('name', header='content-disposition')] = (part.get_filename(), part.get_payload(decode=True))
+        filename, content = fields['file']
+        return fields.get('purpose', (None, b'batch'))[1].decode('utf-8'), filename, content
+
+    def _stream(self, response):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        base = {k: response[k] for k in ('id', 'created', 'model')}
+        base['object'] = 'chat.completion.chunk'
+        call = response['choices'][0]['message']['tool_calls'][0]
+        arguments = call['function']['arguments']
+        events = [{'index': 0, 'id': call['id'], 'type': 'function', 'function': {'name': call['function']['name'], 'arguments': ''}}]
+        events += [{'index': 0, 'function': {'arguments': arguments[i:i + 40]}} for i in range(0, len(arguments), 40)]
+        for delta in events:
+            chunk = {**base, 'choices': [{'index': 0, 'delta': {'tool_calls': [delta]}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        final = {**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'tool_calls'}]}
+        self.wfile.write(f"data: {json.dumps(final)}\n\n".encode('utf-8'))
+        usage = {**base, 'choices': [], 'usage': response['usage']}
+        self.wfile.write(f"data: {json.dumps(usage)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+def prompt_parts(request):
+    """The serialized tools and messages of ``request``, in prompt order."""
+    return [json.dumps(part, sort_keys=True) for part in [request.get('tools')] + request.get('messages', [])]
+
+
+def count_prompt_tokens(request):
+    """Rough prompt size of ``request``; tool definitions count like messages, as providers bill them."""
+    return sum(len(text) for text in prompt_parts(request)) // 4
+
+
+def completion_for(request, prompt_tokens=0, cached_tokens=0):
+    """
+    A chat.completion answering ``request`` with a synthesized call to the forced tool, or else its first one.
+
+    With ``tool_choice: "required"`` every offered tool is called, as a model asked for all of them would.
+    """
+    tools = [tool.get('function', {}) for tool in request.get('tools') or [{}]]
+    choice = request.get('tool_choice')
+    if choice == 'required':
+        called = tools
+    else:
+        forced = choice.get('function', {}).get('name') if isinstance(choice, dict) else None
+        called = [next((tool for tool in tools if tool.get('name') == forced), tools[0])]
+    tool_calls = [{
+        'id': f"call_mock_{index}",
+        'type': 'function',
+        'function': {'name': tool.get('name', 'unknown'), 'arguments': json.dumps(sample_from_schema(tool.get('parameters', {})))},
+    } for index, tool in enumerate(called)]
+    completion_tokens = sum(len(call['function']['arguments']) for call in tool_calls) // 4
+    return {
+        'id': f"chatcmpl-mock-{random.getrandbits(32):08x}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': request.get('model', 'mock'),
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'tool_calls',
+            'message': {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': tool_calls,
+            },
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': cached_tokens},
+        },
+    }
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, seconds_per_1k_tokens=0.0,
+                 batch_delay=1.0, handler=MockOpenAIHandler):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.batch_delay = batch_delay
+        self.stats = MockStats()
+        self.files = {}
+        self.batches = {}
+        self._prefixes = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def cached_tokens(self, request, minimum=1024):
+        """Tokens of the longest prompt prefix already seen, as a provider's prompt cache would serve it."""
+        digest = hashlib.sha256()
+        length = cached = 0
+        with self._lock:
+            for text in prompt_parts(request):
+                digest.update(text.encode('utf-8'))
+                length += len(text)
+                key = digest.hexdigest()
+                if key in self._prefixes:
+                    cached = length // 4
+                self._prefixes.add(key)
+        return cached if cached >= minimum else 0
+
+    def _next_id(self, prefix):
+        with self._lock:
+            return f"{prefix}-mock-{next(self._ids)}"
+
+    def add_file(self, purpose, filename, content):
+        file_id = self._next_id('file')
+        self.files[file_id] = {
+            'content': content,
+            'object': {
+                'id': file_id, 'object': 'file', 'bytes': len(content), 'created_at': int(time.time()),
+                'filename': filename or 'upload.jsonl', 'purpose': purpose, 'status': 'processed',
+            },
+        }
+        return self.files[file_id]['object']
+
+    def add_batch(self, request):
+        batch_id = self._next_id('batch')
+        lines = [json.loads(line) for line in self.files[request['input_file_id']]['content'].splitlines() if line.strip()]
+        self.batches[batch_id] = {
+            'id': batch_id, 'object': 'batch', 'endpoint': request['endpoint'], 'errors': None,
+            'input_file_id': request['input_file_id'], 'completion_window': request['completion_window'],
+            'status': 'in_progress', 'output_file_id': None, 'error_file_id': None,
+            'created_at': int(time.time()), 'in_progress_at': int(time.time()), 'completed_at': None,
+            'metadata': request.get('metadata'),
+            'request_counts': {'total': len(lines), 'completed': 0, 'failed': 0},
+        }
+        timer = threading.Timer(self.batch_delay, self._complete_batch, args=(batch_id, lines))
+        timer.daemon = True
+        timer.start()
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id):
+        with self._lock:
+            return dict(self.batches[batch_id])
+
+    def _complete_batch(self, batch_id, lines):
+        output = []
+        for line in lines:
+            self.stats.record(len(json.dumps(line['body'])))
+            completion = completion_for(line['body'], count_prompt_tokens(line['body']))
+            output.append(json.dumps({
+                'id': f"batch_req_{completion['id']}", 'custom_id': line['custom_id'],
+                'response': {'status_code': 200, 'request_id': completion['id'], 'body': completion}, 'error': None,
+            }))
+        output_file = self.add_file('batch_output', f"{batch_id}_output.jsonl", ('\n'.join(output) + '\n').encode('utf-8'))
+        with self._lock:
+            self.batches[batch_id].update(
+                status='completed', output_file_id=output_file['id'], completed_at=int(time.time()),
+                request_counts={'total': len(lines), 'completed': len(lines), 'failed': 0},
+            )
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve from a background thread; returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra seconds, up to this much")
+    parser.add_argument('--seconds-per-1k-tokens', type=float, default=0.0, help="Extra delay per 1000 prompt tokens")
+    parser.add_argument('--batch-delay', type=float, default=1.0, help="Seconds until a submitted batch completes")
+    args = parser.parse_args()
+    server = MockOpenAIServer(args.host, args.port, args.latency, args.jitter, args.seconds_per_1k_tokens, args.batch_delay)
+    print(f"🚀 Mock OpenAI API at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+End-to-end benchmark of the scan-and-analyze pipeline against a mock model.
+
+Generates a synthetic repository, starts the local mock OpenAI server and
+runs ManagerAgent.analyze_codebase plus each agent's analyze_codebase_*
+against it. For every target it reports walk, read, prompt bytes/tokens,
+model wait and total wall time as JSON, so results can be tracked across
+versions:
+
+    python benchmarks/pipeline.py --files 500 --latency 0.5 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_repo import DEFAULT_MIX, generate_repo, parse_mix
+from benchmarks.mock_openai_server import MockOpenAIServer
+from utils.scanner import scan_project
+from utils.openai_client import register_client, configure_transport, get_client
+from agents.manager_agent import ManagerAgent
+from agents.architecture_agent import ArchitectureAgent
+from agents.static_agent import StaticAgent
+from agents.code_quality_agent import CodeQualityAgent
+from agents.dependency_agent import DependencyAgent
+from agents.performance_agent import PerformanceAgent
+
+AGENTS = {
+    'architecture': (ArchitectureAgent, 'analyze_codebase_architecture'),
+    'static': (StaticAgent, 'analyze_codebase_static'),
+    'code_quality': (CodeQualityAgent, 'analyze_codebase_quality'),
+    'dependency': (DependencyAgent, 'analyze_codebase_dependencies'),
+    'performance': (PerformanceAgent, 'analyze_codebase_performance'),
+}
+TARGETS = ['manager'] + list(AGENTS)
+
+
+class TimedClient:
+    """Wraps an OpenAI client and accounts for every chat completion it makes."""
+
+    def __init__(self, client):
+        self._client = client
+        self.chat = self
+        self.completions = self
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.prompt_bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.model_wait = 0.0
+
+    def create(self, **request):
+        prompt_bytes = len(json.dumps(request.get('messages', [])).encode('utf-8'))
+        start = time.perf_counter()
+        response = self._client.chat.completions.create(**request)
+        elapsed = time.perf_counter() - start
+        usage = getattr(response, 'usage', None)
+        with self._lock:
+            self.requests += 1
+            self.prompt_bytes += prompt_bytes
+            self.model_wait += elapsed
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens or 0
+                self.completion_tokens += usage.completion_tokens or 0
+                details = getattr(usage, 'prompt_tokens_details', None)
+                self.cached_tokens += getattr(details, 'cached_tokens', None) or 0
+        return response
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_target(target, project_root, client, shared_prefix=False, fused=False):
+    """One timed run of ``target`` on a fresh scan of ``project_root``."""
+    client.reset()
+    start = time.perf_counter()
+    inventory = scan_project(project_root, ignore_patterns=['.git'])
+    walk = time.perf_counter() - start
+
+    if target == 'manager':
+        agents = [cls() for cls, _ in AGENTS.values()]
+        selected = inventory.select(lambda path: any(agent.should_analyze_file(path) for agent in agents))
+        run = lambda: ManagerAgent(shared_prefix=shared_prefix, fused=fused).analyze_codebase(inventory)
+    else:
+        cls, method = AGENTS[target]
+        agent = cls()
+        selected = inventory.select(agent.should_analyze_file)
+        run = lambda: getattr(agent, method)(inventory)
+
+    read_start = time.perf_counter()
+    inventory.preload(selected)
+    read = time.perf_counter() - read_start
+
+    run()
+    total = time.perf_counter() - start
+    return {
+        'walk_s': walk,
+        'read_s': read,
+        'files': len(inventory),
+        'files_selected': len(selected),
+        'bytes_read': inventory.bytes_loaded,
+        'requests': client.requests,
+        'prompt_bytes': client.prompt_bytes,
+        'prompt_tokens': client.prompt_tokens,
+        'completion_tokens': client.completion_tokens,
+        'cached_tokens': client.cached_tokens,
+        'model_wait_s': client.model_wait,
+        'total_s': total,
+    }
+
+
+def summarize(runs):
+    """Median of every metric over the repeated runs."""
+    return {key: round(statistics.median(run[key] for run in runs), 4) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scan-and-analyze pipeline")
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--avg-lines', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.2, help="Mock model latency per request in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--seconds-per-1k-tokens', type=float, default=0.0)
+    parser.add_argument('--targets', default=','.join(TARGETS), help="Comma-separated subset of " + ', '.join(TARGETS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--shared-prefix', action='store_true', help="Run the manager with a shared codebase prompt prefix")
+    parser.add_argument('--fused', action='store_true', help="Run the manager with one fused request for all analyses")
+    parser.add_argument('--repo', help="Use (and keep) this directory instead of a temporary one")
+    parser.add_argument('--output', help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(latency=args.latency, jitter=args.jitter,
+                              seconds_per_1k_tokens=args.seconds_per_1k_tokens).start()
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    configure_transport(max_retries=0)
+    client = TimedClient(get_client())
+    register_client(client)
+
+    with tempfile.TemporaryDirectory(prefix='butterfly-bench-') as tmp:
+        project_root = args.repo or tmp
+        repo_bytes = generate_repo(project_root, args.files, args.mix, args.avg_lines, args.seed)
+        results = {}
+        for target in args.targets.split(','):
+            runs = [run_target(target, project_root, client, args.shared_prefix, args.fused) for _ in range(args.repeat)]
+            results[target] = summarize(runs)
+
+    server.stop()
+    report = {
+        'benchmark': 'pipeline',
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {
+            'files': args.files, 'mix': args.mix, 'avg_lines': args.avg_lines, 'seed': args.seed,
+            'repo_bytes': repo_bytes, 'latency': args.latency, 'jitter': args.jitter,
+            'seconds_per_1k_tokens': args.seconds_per_1k_tokens, 'repeat': args.repeat,
+            'shared_prefix': args.shared_prefix, 'fused': args.fused,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Synthetic repositories for benchmarking the scan-and-analyze pipeline.
+
+    python benchmarks/synthetic_repo.py /tmp/synthetic --files 500 --mix py=0.6,js=0.2,json=0.1,md=0.1
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config_manager import create_config_file
+
+DEFAULT_MIX = {'py': 0.6, 'js': 0.2, 'json': 0.1, 'md': 0.1}
+WORDS = ['order', 'user', 'cache', 'report', 'session', 'invoice', 'queue', 'token', 'item', 'event']
+
+
+def parse_mix(text):
+    """``py=0.6,js=0.4`` -> ``{'py': 0.6, 'js': 0.4}``"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def _python_module(rng, index, modules, lines):
+    out = [f'"""Synthetic module {index}."""', 'import os', 'import json']
+    for other in rng.sample(modules, min(3, len(modules))):
+        if other != f"mod_{index}":
+            out.append(f"from pkg import {other}")
+    out.append('')
+    while len(out) < lines:
+        noun = rng.choice(WORDS)
+        out += [
+            f"class {noun.title()}Service{len(out)}:",
+            f'    """Handles {noun} records."""',
+            '',
+            '    def __init__(self, store):',
+            '        self.store = store',
+            '',
+            f'    def load_{noun}(self, key, retries=3):',
+            '        for attempt in range(retries):',
+            '            value = self.store.get(key)',
+            '            if value is not None and attempt >= 0:',
+            '                return json.loads(value)',
+            '        return None',
+            '',
+            f'def process_{noun}_{len(out)}(items):',
+            '    total = 0',
+            '    for item in items:',
+            '        if item.get("active") and not item.get("deleted"):',
+            '            total += item.get("amount", 0)',
+            '    return total',
+            '',
+        ]
+    return '\n'.join(out[:lines]) + '\n'
+
+
+def _js_module(rng, index, lines):
+    out = ["import React from 'react';", "const utils = require('./utils');", '']
+    while len(out) < lines:
+        noun = rng.choice(WORDS)
+        out += [
+            f'export function render{noun.title()}{len(out)}(props) {{',
+            f'  const {noun}s = props.items.filter((x) => x.visible);',
+            f'  return {noun}s.map((x) => utils.format(x));',
+            '}',
+            '',
+        ]
+    return '\n'.join(out[:lines]) + '\n'
+
+
+def _json_fixture(rng, lines):
+    return json.dumps([
+        {'id': i, 'name': rng.choice(WORDS), 'amount': rng.randint(1, 1000), 'active': rng.random() > 0.5}
+        for i in range(lines)
+    ], indent=1)
+
+
+def _markdown(rng, lines):
+    return '\n'.join(f"- {rng.choice(WORDS)} {rng.choice(WORDS)} notes" for _ in range(lines)) + '\n'
+
+
+def generate_repo(root, files=200, mix=None, avg_lines=150, seed=0):
+    """
+    Write a synthetic project with ``files`` source/data files to ``root``.
+
+    :param mix: ``{kind: weight}`` with kinds py, js, json and md
+    :return: Total bytes written
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=files)
+    modules = [f"mod_{i}" for i, kind in enumerate(kinds) if kind == 'py']
+
+    os.makedirs(os.path.join(root, 'pkg'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'web'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'fixtures'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'docs'), exist_ok=True)
+    create_config_file(Path(root))
+
+    written = {
+        'requirements.txt': 'requests>=2.0\nrich\npydantic>=1.10\n',
+        'package.json': json.dumps({'dependencies': {'react': '^18.2.0'}, 'devDependencies': {'jest': '^29'}}),
+        'pkg/__init__.py': '',
+    }
+    for index, kind in enumerate(kinds):
+        lines = max(5, int(rng.gauss(avg_lines, avg_lines / 3)))
+        if kind == 'py':
+            written[f"pkg/mod_{index}.py"] = _python_module(rng, index, modules, lines)
+        elif kind == 'js':
+            written[f"web/component_{index}.js"] = _js_module(rng, index, lines)
+        elif kind == 'json':
+            written[f"fixtures/data_{index}.json"] = _json_fixture(rng, lines)
+        else:
+            written[f"docs/page_{index}.md"] = _markdown(rng, lines)
+
+    total = 0
+    for rel_path, content in written.items():
+        with open(os.path.join(root, rel_path), 'w', encoding='utf-8') as f:
+            f.write(content)
+        total += len(content.encode('utf-8'))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic repository")
+    parser.add_argument('root')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--avg-lines', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    total = generate_repo(args.root, args.files, args.mix, args.avg_lines, args.seed)
+    print(f"✅ Wrote {args.files} files ({total} bytes) to {args.root}")
+
+
+if __name__ == '__main__':
+    main()
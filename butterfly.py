@@ -1,5 +1,3 @@
-import os
-import json
 import threading
 from pathlib import Path
 from rich.console import Console
@@ -15,20 +13,73 @@ from utils.env_manager import set_api_key, get_api_key
 from utils.config_manager import root, create_config_file, load_config, update_config
 from utils.api_client import ButterflyAPIClient
 from utils.api_key_manager import generate_and_store_api_key, validate_api_key
+from utils.scanner import scan_project
+from utils.file_watcher import FULL_RESCAN, create_watcher, watch_changes
+from utils.history_store import open_history, DEFAULT_HISTORY_PATH
+from utils.findings_store import FindingsStore, DEFAULT_FINDINGS_DB
+from utils.openai_client import configure_transport, load_environment
+from utils.batch_client import BatchClient
+from utils.finding_sinks import ConsoleFindingSink, GuiFindingSink, FindingFanout, DEFAULT_GUI_SERVICE_URL
+from utils.telemetry import configure_telemetry, JsonLogSink, PrometheusSink, OpenTelemetrySink
 from utils.visual_utils import create_header, create_section, create_table, format_report
 
 console = Console()
 
-def run_background_analysis(manager_agent):
+def run_analysis_cycle(manager_agent, inventory=None):
+    try:
+        manager_agent.analyze_codebase(inventory)
+        console.print("[green]Analysis completed successfully.[/green]")
+        cache = manager_agent.agent_options.get('cache')
+        if cache is not None:
+            stats = cache.stats()
+            console.print(f"[cyan]Result cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries[/cyan]")
+        usage = manager_agent.prompt_cache_usage
+        if usage is not None:
+            console.print(f"[cyan]Prompt cache: {usage['cachedTokens']} of {usage['promptTokens']} prompt tokens cached ({usage['cachedRatio']:.0%})[/cyan]")
+    except Exception as e:
+        console.print(f"[red]Error during analysis: {str(e)}[/red]")
+
+
+def run_background_analysis(manager_agent, scan_interval=3600):
     while True:
-        try:
-            results = manager_agent.analyze_codebase()  # Call on instance
-            # Process results (e.g., send to server, update local files, etc.)
-            console.print("[green]Analysis completed successfully.[/green]")
-        except Exception as e:
-            console.print(f"[red]Error during analysis: {str(e)}[/red]")
+        run_analysis_cycle(manager_agent)
         # Wait for some time before the next analysis
-        threading.Event().wait(3600)  # Run every hour
+        threading.Event().wait(scan_interval)
+
+
+def run_watch_daemon(manager_agent, project_root, poll_interval=2.0, debounce=2.0):
+    """Re-analyze whenever files change instead of on a fixed schedule."""
+    inventory = scan_project(project_root)
+    watcher = create_watcher(inventory, poll_interval=poll_interval)
+    console.print(f"[cyan]Watching {project_root} for changes ({type(watcher).__name__}).[/cyan]")
+
+    for changed in watch_changes(watcher, debounce=debounce):
+        if changed is FULL_RESCAN:
+            console.print("[yellow]Lost track of file events, rescanning the project...[/yellow]")
+            inventory = scan_project(project_root)
+            watcher.inventory = inventory
+        else:
+            inventory.refresh(changed)
+            console.print(f"[cyan]{len(changed)} file(s) changed, re-analyzing...[/cyan]")
+        run_analysis_cycle(manager_agent, inventory)
+
+
+def create_telemetry_sinks(config):
+    """The telemetry sinks named in ``TELEMETRY``."""
+    sinks = []
+    for name in config.get('TELEMETRY', []):
+        if name == 'json':
+            sinks.append(JsonLogSink(config.get('TELEMETRY_LOG_PATH', 'telemetry.jsonl')))
+        elif name == 'prometheus':
+            sinks.append(PrometheusSink(config.get('METRICS_PATH', 'metrics.prom')))
+        elif name == 'otel':
+            try:
+                sinks.append(OpenTelemetrySink())
+            except ImportError:
+                console.print("[yellow]opentelemetry-api is not installed; OpenTelemetry export disabled.[/yellow]")
+        else:
+            console.print(f"[yellow]Unknown telemetry sink {name!r} ignored.[/yellow]")
+    return sinks
 
 
 def main():
@@ -40,7 +91,9 @@ def main():
         create_config_file(project_root)
     
     config = load_config()
-    
+
+    # The agents load .env lazily; the API key and key database are read from it right away
+    load_environment()
     api_key = get_api_key()
     if not api_key:
         console.print("[yellow]No API key found. Generating a new one...[/yellow]")
@@ -57,9 +110,41 @@ def main():
 
     console.print("[cyan]Butterfly is now running in the background. You can continue your development.[/cyan]")
 
-    manager_agent = ManagerAgent()  # Create an instance of ManagerAgent
+    configure_transport(
+        max_connections=config.get('HTTP_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=config.get('HTTP_KEEPALIVE_CONNECTIONS', 10),
+        timeout=config.get('REQUEST_TIMEOUT', 600),
+        max_retries=config.get('MAX_RETRIES', 5),
+        requests_per_minute=config.get('RATE_LIMIT_RPM'),
+        tokens_per_minute=config.get('RATE_LIMIT_TPM'),
+    )
+    configure_telemetry(*create_telemetry_sinks(config))
+    on_finding = None
+    if config.get('STREAM_FINDINGS', False):
+        sinks = [ConsoleFindingSink(console)]
+        gui_service_url = config.get('GUI_SERVICE_URL', DEFAULT_GUI_SERVICE_URL)
+        if gui_service_url:
+            sinks.append(GuiFindingSink(gui_service_url))
+        on_finding = FindingFanout(*sinks)
+    manager_agent = ManagerAgent.from_config(config, on_finding=on_finding)
     # Start background analysis
-    threading.Thread(target=run_background_analysis, args=(manager_agent,), daemon=True).start()  # Pass instance
+    if config.get('WATCH', False):
+        threading.Thread(
+            target=run_watch_daemon,
+            args=(manager_agent, project_root, config.get('WATCH_POLL_INTERVAL', 2.0), config.get('WATCH_DEBOUNCE', 2.0)),
+            daemon=True
+        ).start()
+    else:
+        background_agent = manager_agent
+        if config.get('BATCH_MODE', False):
+            # Scheduled scans are not urgent: collect every agent's requests into one batch per run
+            background_agent = ManagerAgent.from_config(config, client=BatchClient(
+                collect_window=config.get('BATCH_COLLECT_WINDOW', 5),
+                poll_interval=config.get('BATCH_POLL_INTERVAL', 60),
+                batch_dir=config.get('BATCH_DIR'),
+            ))
+            background_agent.agent_timeout = None  # batches complete within hours, not seconds
+        threading.Thread(target=run_background_analysis, args=(background_agent, config.get('SCAN_INTERVAL', 3600)), daemon=True).start()  # Pass instance
 
     with Progress(
         SpinnerColumn(),
@@ -100,23 +185,16 @@ def main():
 
     console.log("Report generation complete.")
 
-    # Append results to json.json
-    json_file_path = 'json.json'
-    if os.path.exists(json_file_path):
-        with open(json_file_path, 'r') as json_file:
-            try:
-                existing_data = json.load(json_file)
-            except json.JSONDecodeError:
-                existing_data = []
-    else:
-        existing_data = []
-
-    existing_data.append(report_data)
+    # Append results to the analysis history (imports the legacy json.json on first use)
+    history = open_history(config.get('HISTORY_PATH', DEFAULT_HISTORY_PATH))
+    history.append(report_data)
 
-    with open(json_file_path, 'w') as json_file:
-        json.dump(existing_data, json_file, indent=4)
+    console.log(f"Analysis results appended to {history.path}.")
 
-    console.log("Analysis results appended to json.json.")
+    findings = FindingsStore(config.get('FINDINGS_DB', DEFAULT_FINDINGS_DB), project_root=project_root)
+    run_id = findings.record_run(report_data, manager_agent.inventory)
+    findings.close()
+    console.log(f"Findings for run {run_id} stored in {findings.db_path}.")
 
     # Keep the main thread alive
     try:
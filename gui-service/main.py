@@ -1,14 +1,25 @@
+import json
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from .websocket_server import WebSocketServer
 from .message_broker import MessageBroker
 
 
-app = FastAPI()
-
 ws_server = WebSocketServer()
 message_broker = MessageBroker()
+message_broker.subscribe(ws_server)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ws_server.start()  # Broadcast from uvicorn's own event loop
+    yield
+    await ws_server.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.websocket("/ws")(ws_server.websocket_endpoint)
 
@@ -22,12 +33,25 @@ class Report(BaseModel):
 def generate_report(report: Report):
     try:
    
-        message_broker.notify_report_generated(report.title)
+        message_broker.notify_subscribers(report.title)
         return {"message": "Report generated successfully!"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class Finding(BaseModel):
+    agent: str
+    category: str
+    item: object
+
+
+@app.post("/findings/")
+def stream_finding(finding: Finding):
+    """Relay a finding streamed by a running analysis to the connected dashboards."""
+    message_broker.publish(json.dumps({"type": "finding", **finding.dict()}))
+    return {"message": "Finding published"}
+
+
 def start_server():
     try:
         uvicorn.run(app, host='127.0.0.1', port=8000)
@@ -1,32 +1,122 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 import asyncio
 import threading
-import queue
+
+
+class ClientConnection:
+    """A connected dashboard with its own bounded send buffer and sender task."""
+
+    def __init__(self, websocket: WebSocket, buffer_size):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+        self.task = None
+
+    async def sender(self):
+        while True:
+            message = await self.queue.get()
+            await self.websocket.send_text(message)
+
 
 class WebSocketServer:
-    def __init__(self):
+    """
+    Broadcasts messages to every connected client from the server's event loop.
+
+    Publishing is cheap and thread-safe: a message is handed to the loop and
+    copied into each client's bounded buffer, and every client drains its own
+    buffer concurrently, so one slow socket never delays the others. When a
+    buffer is full the ``slow_consumer_policy`` decides whether the oldest
+    message is dropped ("drop") or the client is disconnected ("disconnect").
+    """
+
+    def __init__(self, buffer_size=100, slow_consumer_policy="drop"):
         self.app = FastAPI()
-        self.message_queue = queue.Queue()
-        self.clients = []
-        self.start_worker()
+        self.buffer_size = buffer_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.clients = set()
+        self.loop = None
+        self.message_queue = None
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._broadcaster = None
 
-    def start_worker(self):
-        threading.Thread(target=self.message_worker, daemon=True).start()
+    async def start(self):
+        """Bind to the running event loop; call from the app's lifespan."""
+        self.message_queue = asyncio.Queue()
+        with self._pending_lock:
+            for message in self._pending:
+                self.message_queue.put_nowait(message)
+            self._pending.clear()
+            self.loop = asyncio.get_running_loop()
+        self._broadcaster = asyncio.create_task(self.message_worker())
+
+    async def stop(self):
+        if self._broadcaster is not None:
+            self._broadcaster.cancel()
+        for client in list(self.clients):
+            await self._disconnect(client)
 
     async def websocket_endpoint(self, websocket: WebSocket):
+        if self.loop is None:
+            await self.start()
         await websocket.accept()
-        self.clients.append(websocket)
+        client = ClientConnection(websocket, self.buffer_size)
+        client.task = asyncio.create_task(client.sender())
+        self.clients.add(client)
         try:
             while True:
                 await websocket.receive_text()
-        except:
-            self.clients.remove(websocket)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            self.clients.discard(client)
+            client.task.cancel()
 
-    def message_worker(self):
+    async def message_worker(self):
         while True:
-            message = self.message_queue.get()
-            for client in self.clients:
-                asyncio.run(client.send_text(message))
+            message = await self.message_queue.get()
+            for client in list(self.clients):
+                self._offer(client, message)
+
+    def _offer(self, client, message):
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if self.slow_consumer_policy == "disconnect":
+                self.clients.discard(client)
+                asyncio.create_task(self._disconnect(client))
+                return
+            client.queue.get_nowait()
+            client.queue.put_nowait(message)
+            client.dropped += 1
+
+    async def _disconnect(self, client):
+        self.clients.discard(client)
+        if client.task is not None:
+            client.task.cancel()
+        try:
+            await client.websocket.close(code=1008, reason="Client too slow")
+        except Exception:
+            pass
+
+    def publish(self, message):
+        """Queue ``message`` for broadcast; safe to call from any thread."""
+        with self._pending_lock:
+            if self.loop is None:
+                self._pending.append(message)
+                return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.message_queue.put_nowait(message)
+        else:
+            self.loop.call_soon_threadsafe(self.message_queue.put_nowait, message)
+
+    def notify(self, message):
+        """Subscriber hook for MessageBroker."""
+        self.publish(message)
 
     def report_generated(self, report):
-        self.message_queue.put(f"New report generated: {report}")
+        self.publish(f"New report generated: {report}")
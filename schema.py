@@ -1,4 +1,5 @@
 import sqlite3
+from utils.findings_store import FINDINGS_SCHEMA
 
 conn = sqlite3.connect('root.db')
 
@@ -24,6 +25,11 @@ CREATE TABLE IF NOT EXISTS analysis_results (
     FOREIGN KEY(user_id) REFERENCES users(id)
 )''')
 
+cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_results_timestamp ON analysis_results(timestamp)')
+
+# Create the normalized runs/agents/files/findings tables and their indexes
+cursor.executescript(FINDINGS_SCHEMA)
+
 # Commit the changes and close the connection
 conn.commit()
 conn.close()
@@ -1,6 +1,4 @@
 import os
-import json
-import sqlite3
 import logging
 from agents.architecture_agent import ArchitectureAgent
 from agents.code_quality_agent import CodeQualityAgent
@@ -8,6 +6,8 @@ from agents.dependency_agent import DependencyAgent
 from agents.performance_agent import PerformanceAgent
 from agents.static_agent import StaticAgent
 from dotenv import load_dotenv
+from utils.history_store import open_history
+from utils.findings_store import FindingsStore
 from api_generation.utils.db_utils import insert_user
 
 # Configure logging
@@ -63,13 +63,10 @@ def run_all_analyses():
     except Exception as e:
         print(f"[red]Error during static code analysis: {str(e)}[/red]")
 
-    # Format results into a JSON object
-    formatted_results = json.dumps(results, indent=2)
-    
-    # Write results to json.json
-    with open('json.json', 'w') as json_file:
-        json_file.write(formatted_results)
-        print("[green]Results written to json.json successfully.[/green]")
+    # Append results to the analysis history instead of overwriting json.json
+    history = open_history()
+    history.append(results)
+    print(f"[green]Results appended to {history.path} successfully.[/green]")
 
     # Append results to the database
     append_results_to_db(results)
@@ -77,17 +74,13 @@ def run_all_analyses():
 # Function to append results to the database
 
 def append_results_to_db(results):
-    conn = sqlite3.connect('root.db')
-    cursor = conn.cursor()
-
-    for key, value in results.items():
-        # Ensure value is a string for overallSummary
-        overall_summary = value.get('summary', 'No summary available') if isinstance(value, dict) else 'No summary available'
-        cursor.execute("INSERT INTO analysis_results (user_id, overallProjectHealth, overallSummary, formatted_report) VALUES (?, ?, ?, ?)", (1, key, overall_summary, json.dumps(value)))
-
-    conn.commit()
-    print("[green]Results appended to the database successfully.[/green]")
-    conn.close()
+    store = FindingsStore('root.db')
+    try:
+        # One transaction: a run row plus every finding, bulk inserted
+        run_id = store.record_run(results, user_id=1)
+    finally:
+        store.close()
+    print(f"[green]Results appended to the database successfully (run {run_id}).[/green]")
 
 # Function to insert API key into the database
 
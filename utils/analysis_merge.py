@@ -0,0 +1,56 @@
+import json
+
+
+def item_key(item):
+    """Stable identity for a finding, which may be a string or a dict."""
+    return item if isinstance(item, str) else json.dumps(item, sort_keys=True)
+
+
+def dedupe_items(items):
+    seen = set()
+    unique = []
+    for item in items:
+        key = item_key(item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def reduce_analyses(model_cls, results):
+    """
+    Combine several partial analyses of the same schema into one.
+
+    Lists are concatenated without duplicates, dicts are merged, counts are
+    summed, scores are averaged and differing free-text assessments are kept
+    side by side.
+
+    :param model_cls: The pydantic model the partial results are instances of
+    :param results: The partial results; None entries are ignored
+    :return: A single model_cls instance, or None when there is nothing to combine
+    """
+    results = [result for result in results if result is not None]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    dicts = [result.dict() for result in results]
+    merged = {}
+    for field, first in dicts[0].items():
+        values = [d[field] for d in dicts]
+        if isinstance(first, list):
+            merged[field] = dedupe_items(item for value in values for item in value)
+        elif isinstance(first, dict):
+            merged[field] = {k: v for value in values for k, v in value.items()}
+        elif isinstance(first, bool):
+            merged[field] = any(values)
+        elif isinstance(first, int):
+            merged[field] = sum(values)
+        elif isinstance(first, float):
+            merged[field] = sum(values) / len(values)
+        elif isinstance(first, str):
+            merged[field] = "\n\n".join(dedupe_items(value for value in values if value))
+        else:
+            merged[field] = first
+    return model_cls.parse_obj(merged)
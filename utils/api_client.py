@@ -1,4 +1,3 @@
-import requests
 from .api_key_manager import validate_api_key
 
 class ButterflyAPIClient:
@@ -12,6 +11,7 @@ class ButterflyAPIClient:
             return False
         
         # If it's valid locally, we can also check with the server
+        import requests  # deferred: only needed for this round trip
         try:
             response = requests.get(
                 f"{self.base_url}/validate",
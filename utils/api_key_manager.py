@@ -1,12 +1,18 @@
 import os
 import uuid
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 
-DATABASE_PATH = os.getenv('DATABASE_PATH')
+_table_ready = False
+_table_lock = threading.Lock()
+
+def database_path():
+    """The key database named by DATABASE_PATH, read when used so that a .env loaded later applies."""
+    return os.getenv('DATABASE_PATH')
 
 def create_api_key_table():
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(database_path())
     cursor = conn.cursor()
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS api_keys
@@ -15,11 +21,20 @@ def create_api_key_table():
     conn.commit()
     conn.close()
 
+def ensure_api_key_table():
+    """Create the api_keys table the first time a key is stored or validated."""
+    global _table_ready
+    with _table_lock:
+        if not _table_ready:
+            create_api_key_table()
+            _table_ready = True
+
 def generate_api_key():
     return str(uuid.uuid4())
 
 def store_api_key(api_key, expiration_days=365):
-    conn = sqlite3.connect(DATABASE_PATH)
+    ensure_api_key_table()
+    conn = sqlite3.connect(database_path())
     cursor = conn.cursor()
     created_at = datetime.now()
     expires_at = created_at + timedelta(days=expiration_days)
@@ -29,7 +44,8 @@ def store_api_key(api_key, expiration_days=365):
     conn.close()
 
 def validate_api_key(api_key):
-    conn = sqlite3.connect(DATABASE_PATH)
+    ensure_api_key_table()
+    conn = sqlite3.connect(database_path())
     cursor = conn.cursor()
     cursor.execute('SELECT expires_at FROM api_keys WHERE key = ?', (api_key,))
     result = cursor.fetchone()
@@ -44,6 +60,3 @@ def generate_and_store_api_key():
     api_key = generate_api_key()
     store_api_key(api_key)
     return api_key
-
-# Initialize the database
-create_api_key_table()
\ No newline at end of file
@@ -0,0 +1,14 @@
+import ast
+import threading
+
+# CPython < 3.13 keeps the AST converter's recursion depth in per-interpreter
+# state (gh-106905), so ast.parse on several threads at once can fail with
+# "AST constructor recursion depth mismatch". Agents parse on their own
+# threads; serialize the calls.
+_parse_lock = threading.Lock()
+
+
+def parse(source, filename='<unknown>'):
+    """Thread-safe ``ast.parse``."""
+    with _parse_lock:
+        return ast.parse(source, filename=filename)
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import itertools
+import tempfile
+import threading
+from concurrent.futures import Future
+from .openai_client import get_client
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchError(RuntimeError):
+    """A request sent through the batch API did not produce a completion."""
+
+
+class BatchClient:
+    """
+    Stands in for the OpenAI client in agents, answering ``chat.completions.create`` through the batch API.
+
+    Calls block like the real client, but instead of being sent one by one
+    the requests of all agents are collected: once no new request has
+    arrived for ``collect_window`` seconds they are written to a JSONL
+    batch file, uploaded and submitted as one batch, which is polled every
+    ``poll_interval`` seconds. Each caller then gets its
+    ``ChatCompletion`` from the batch's output (or a BatchError). Requests
+    arriving while a batch is in flight go into the next one.
+
+    Batched requests are not charged against the real-time rate limiter and
+    cannot be streamed.
+    """
+
+    batched = True
+
+    def __init__(self, client=None, collect_window=5.0, poll_interval=30.0, completion_window="24h", batch_dir=None,
+                 max_requests=50000):
+        """
+        :param client: OpenAI client used for the files and batches endpoints; defaults to the shared client
+        :param collect_window: Seconds without a new request after which the collected requests are submitted
+        :param poll_interval: Seconds between batch status checks
+        :param completion_window: The provider's completion window for the batch
+        :param batch_dir: Keep the JSONL batch files in this directory; by default they are written to the temp
+            directory and deleted once uploaded
+        :param max_requests: Submit early once this many requests are collected
+        """
+        self._client = client
+        self.chat = self
+        self.completions = self
+        self.collect_window = collect_window
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.batch_dir = batch_dir or tempfile.gettempdir()
+        self.keep_files = batch_dir is not None
+        self.max_requests = max_requests
+        self._ids = itertools.count(1)
+        self._pending = []
+        self._last_request = 0.0
+        self._cond = threading.Condition()
+        self._collector = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def create(self, **request):
+        if request.pop("stream", False):
+            raise BatchError("Batched requests cannot be streamed")
+        request.pop("stream_options", None)
+        future = Future()
+        with self._cond:
+            self._pending.append((f"butterfly-{os.getpid()}-{next(self._ids)}", request, future))
+            self._last_request = time.monotonic()
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name="batch-collector", daemon=True)
+                self._collector.start()
+            self._cond.notify()
+        return future.result()
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._pending:
+                        self._cond.wait()
+                        continue
+                    idle = time.monotonic() - self._last_request
+                    if idle >= self.collect_window or len(self._pending) >= self.max_requests:
+                        break
+                    self._cond.wait(self.collect_window - idle)
+                requests, self._pending = self._pending[:self.max_requests], self._pending[self.max_requests:]
+            threading.Thread(target=self._run, args=(requests,), name="batch-poller", daemon=True).start()
+
+    def _run(self, requests):
+        try:
+            results = self.run_batch([(custom_id, request) for custom_id, request, _ in requests])
+        except Exception as e:
+            for _, _, future in requests:
+                future.set_exception(e)
+            return
+        for custom_id, _, future in requests:
+            result = results.get(custom_id)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            elif result is None:
+                future.set_exception(BatchError(f"No result for batched request {custom_id}"))
+            else:
+                future.set_result(result)
+
+    def write_batch_file(self, requests):
+        """Write ``[(custom_id, request)]`` as a batch input file; returns its path."""
+        fd, path = tempfile.mkstemp(prefix="butterfly-batch-", suffix=".jsonl", dir=self.batch_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for custom_id, request in requests:
+                f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": request}) + "\n")
+        return path
+
+    def run_batch(self, requests):
+        """
+        Submit ``[(custom_id, request)]`` as one batch and wait for it.
+
+        :return: {custom_id: ChatCompletion or BatchError}
+        """
+        from openai.types.chat import ChatCompletion
+
+        path = self.write_batch_file(requests)
+        try:
+            with open(path, "rb") as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+        finally:
+            # The file holds every prompt, i.e. the whole codebase
+            if not self.keep_files:
+                os.remove(path)
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"source": "butterfly", "requests": str(len(requests))},
+        )
+        print(f"🚀 Submitted batch {batch.id} with {len(requests)} request(s)")
+        while batch.status not in FINAL_STATUSES:
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or response.get("body", {}).get("error")
+                    results[record["custom_id"]] = BatchError(f"Batched request {record['custom_id']} failed: {error}")
+                else:
+                    results[record["custom_id"]] = ChatCompletion.parse_obj(response["body"])
+        self.delete_files(input_file.id, batch.output_file_id, batch.error_file_id)
+        if batch.status != "completed":
+            print(f"❌ Batch {batch.id} ended as {batch.status}; {len(results)} of {len(requests)} result(s) available")
+        else:
+            print(f"✅ Batch {batch.id} completed")
+        return results
+
+    def delete_files(self, *file_ids):
+        """Remove a batch's input and result files from the provider; failures are only reported."""
+        for file_id in file_ids:
+            if not file_id:
+                continue
+            try:
+                self.client.files.delete(file_id)
+            except Exception as e:
+                print(f"❌ Could not delete batch file {file_id}: {e}")
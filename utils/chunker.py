@@ -0,0 +1,137 @@
+import re
+import ast
+from .ast_parse import parse as parse_python
+
+_encoding = None
+
+# Top-level definitions in the common non-Python languages we analyse
+_BOUNDARY_PATTERN = re.compile(
+    r'^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:pub\s+)?'
+    r'(?:function|class|def|func|fn|interface|struct|impl|enum|trait|module|'
+    r'public|private|protected|internal|static)\b'
+)
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def estimate_tokens(text):
+    """Count tokens with tiktoken when installed, otherwise approximate at four characters per token."""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _python_boundaries(content):
+    """Line indices where top-level definitions and methods of top-level classes start."""
+    tree = parse_python(content)
+    starts = []
+    for node in tree.body:
+        nodes = [node]
+        if isinstance(node, ast.ClassDef):
+            nodes += [child for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+        for item in nodes:
+            decorators = getattr(item, 'decorator_list', [])
+            starts.append(min([item.lineno] + [d.lineno for d in decorators]) - 1)
+    return sorted(set(starts))
+
+
+def _regex_boundaries(lines):
+    return [i for i, line in enumerate(lines) if _BOUNDARY_PATTERN.match(line)]
+
+
+def _split_lines(text, max_tokens):
+    parts = []
+    current = []
+    current_tokens = 0
+    for line in text.splitlines(keepends=True):
+        tokens = estimate_tokens(line)
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(''.join(current))
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def split_content(path, content, max_tokens):
+    """
+    Split a file into pieces of at most ``max_tokens``, cutting on function or class boundaries.
+
+    Units that are still too large on their own are cut by lines.
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return [content]
+
+    lines = content.splitlines(keepends=True)
+    boundaries = None
+    if path.endswith('.py'):
+        try:
+            boundaries = _python_boundaries(content)
+        except (SyntaxError, ValueError):
+            boundaries = None
+    if boundaries is None:
+        boundaries = _regex_boundaries(lines)
+
+    edges = sorted(set([0] + boundaries + [len(lines)]))
+    units = [''.join(lines[start:end]) for start, end in zip(edges, edges[1:]) if start < end]
+
+    parts = []
+    current = ''
+    current_tokens = 0
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if tokens > max_tokens:
+            if current:
+                parts.append(current)
+                current, current_tokens = '', 0
+            parts.extend(_split_lines(unit, max_tokens))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(current)
+            current, current_tokens = '', 0
+        current += unit
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
+def pack_batches(file_paths, file_contents, max_tokens):
+    """
+    Pack files into batches whose formatted size stays under ``max_tokens``.
+
+    :return: A list of (file_paths, file_contents) tuples; split files appear as "path (part i/n)"
+    """
+    batches = []
+    paths, contents = [], []
+    used = 0
+    for path, content in zip(file_paths, file_contents):
+        # Leave room for the "File: ...\n\nContent:\n" header each file gets in the prompt
+        overhead = estimate_tokens(f"File: {path} (part 00/00)\n\nContent:\n\n\n")
+        pieces = split_content(path, content, max(1, max_tokens - overhead))
+        for i, piece in enumerate(pieces):
+            label = path if len(pieces) == 1 else f"{path} (part {i + 1}/{len(pieces)})"
+            tokens = estimate_tokens(piece) + overhead
+            if paths and used + tokens > max_tokens:
+                batches.append((paths, contents))
+                paths, contents = [], []
+                used = 0
+            paths.append(label)
+            contents.append(piece)
+            used += tokens
+    if paths:
+        batches.append((paths, contents))
+    return batches
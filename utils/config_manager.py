@@ -23,15 +23,51 @@ def create_config_file(project_root):
             f.write("\ndef get_project_root():\n    return PROJECT_ROOT\n")
             f.write("\nSCAN_INTERVAL = 3600  # Time between scans in seconds\n")
             f.write("IGNORE_PATTERNS = ['.git', 'node_modules', 'venv']  # Directories to ignore during scans\n")
+            f.write("MAX_CONCURRENT_AGENTS = 5  # Number of analysis agents allowed to run at the same time\n")
+            f.write("AGENT_TIMEOUT = 600  # Seconds before a single agent's analysis is abandoned\n")
+            f.write("CACHE_PATH = 'cache.db'  # SQLite file holding cached agent results\n")
+            f.write("CACHE_MAX_AGE = 604800  # Seconds before a cached result expires\n")
+            f.write("CACHE_MAX_BYTES = 67108864  # Size the result cache is trimmed to\n")
+            f.write("INCREMENTAL = True  # Only send files changed since the last analysis to the model\n")
+            f.write("INCREMENTAL_DEPENDENTS = 1  # Levels of importing modules re-analysed along with a changed file\n")
+            f.write("MAX_PROMPT_TOKENS = 100000  # Token budget per model request; larger inputs are analysed in batches\n")
+            f.write("BATCH_WORKERS = 4  # Batches of one agent sent to the model at the same time\n")
+            f.write("WATCH = True  # Re-analyze on file changes instead of every SCAN_INTERVAL seconds\n")
+            f.write("WATCH_DEBOUNCE = 2.0  # Seconds of quiet after a burst of edits before re-analyzing\n")
+            f.write("WATCH_POLL_INTERVAL = 2.0  # Polling period when inotify is unavailable\n")
+            f.write("HISTORY_PATH = 'history.jsonl'  # Append-only log of analysis reports\n")
+            f.write("FINDINGS_DB = 'root.db'  # SQLite database with the normalized findings history\n")
+            f.write("HTTP_MAX_CONNECTIONS = 20  # Connections to the model API shared by all agents\n")
+            f.write("HTTP_KEEPALIVE_CONNECTIONS = 10  # Idle connections kept open for reuse\n")
+            f.write("REQUEST_TIMEOUT = 600  # Seconds a single model request may take\n")
+            f.write("MAX_RETRIES = 5  # Retries of rate-limited or failed model requests, with jittered backoff\n")
+            f.write("RATE_LIMIT_RPM = 500  # Client-side requests per minute limit (None to disable)\n")
+            f.write("RATE_LIMIT_TPM = 200000  # Client-side tokens per minute limit (None to disable)\n")
+            f.write("STREAM_FINDINGS = True  # Show findings while the model is still answering\n")
+            f.write("GUI_SERVICE_URL = 'http://127.0.0.1:8000'  # gui-service that streamed findings are forwarded to (None to disable)\n")
+            f.write("CONTENT_MODES = {'ARCHITECTURE_ANALYSIS': 'skeleton'}  # 'full' file contents or 'skeleton' (imports, signatures, docstrings, calls) per agent\n")
+            f.write("MAX_FILE_BYTES = 262144  # Larger or generated files are reduced to their skeleton and capped at this size\n")
+            f.write("READ_MAX_FILE_BYTES = 4194304  # Only this much of a file is read from disk\n")
+            f.write("READ_MAX_TOTAL_BYTES = 268435456  # Files beyond this total read per scan are skipped\n")
+            f.write("LOAD_WORKERS = 8  # Threads reading file contents in parallel\n")
+            f.write("TELEMETRY = ['json', 'prometheus']  # Per-stage timings and token counts: 'json', 'prometheus' and/or 'otel' ([] to disable)\n")
+            f.write("TELEMETRY_LOG_PATH = 'telemetry.jsonl'  # JSON lines log of every recorded span\n")
+            f.write("METRICS_PATH = 'metrics.prom'  # Prometheus metrics file, served by api-generation's /metrics (BUTTERFLY_METRICS_PATH)\n")
+            f.write("SHARED_PROMPT_PREFIX = True  # Send the codebase as one prompt prefix shared by all agents so the provider's prompt cache serves it (non-incremental runs)\n")
+            f.write("FUSED_ANALYSIS = False  # Ask for all five analyses in one request when the codebase fits into MAX_PROMPT_TOKENS; missing ones are requested per agent\n")
+            f.write("BATCH_MODE = False  # Send the scheduled background scans through the batch API (cheaper, results within 24h)\n")
+            f.write("BATCH_POLL_INTERVAL = 60  # Seconds between status checks of a submitted batch\n")
+            f.write("BATCH_COLLECT_WINDOW = 5  # Seconds without a new request before the collected requests are submitted\n")
+            f.write("BATCH_DIR = None  # Keep the JSONL batch files in this directory (None: temp files deleted after upload)\n")
     return config_path
 
-def load_config():
+def load_config(project_root=None):
     """Load the configuration from butterfly.config.py."""
-    project_root = root()
+    project_root = project_root or root()
     if not project_root:
         raise FileNotFoundError("butterfly.config.py not found in this or any parent directory")
     
-    config_path = project_root / 'butterfly.config.py'
+    config_path = Path(project_root) / 'butterfly.config.py'
     config = {}
     with config_path.open() as f:
         exec(f.read(), config)
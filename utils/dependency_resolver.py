@@ -0,0 +1,443 @@
+import os
+import re
+import sys
+import ast
+import json
+from .ast_parse import parse as parse_python
+
+PYTHON_MANIFESTS = ('requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile.lock', 'poetry.lock')
+NODE_MANIFESTS = ('package.json', 'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock')
+MANIFEST_NAMES = PYTHON_MANIFESTS + NODE_MANIFESTS
+
+# Distributions whose import name differs from the normalized project name
+IMPORT_ALIASES = {
+    'pyyaml': ['yaml'],
+    'python_dotenv': ['dotenv'],
+    'beautifulsoup4': ['bs4'],
+    'pillow': ['PIL'],
+    'scikit_learn': ['sklearn'],
+    'opencv_python': ['cv2'],
+    'opencv_python_headless': ['cv2'],
+    'protobuf': ['google'],
+    'attrs': ['attr', 'attrs'],
+    'python_dateutil': ['dateutil'],
+    'pyjwt': ['jwt'],
+    'python_jose': ['jose'],
+    'pymysql': ['pymysql'],
+    'psycopg2_binary': ['psycopg2'],
+    'uvicorn_standard': ['uvicorn'],
+    'python_multipart': ['multipart'],
+    'typing_extensions': ['typing_extensions'],
+    'setuptools': ['setuptools', 'pkg_resources'],
+}
+
+# Packages that are used without being imported (servers, CLIs, build tooling)
+NOT_IMPORTED = {'uvicorn', 'gunicorn', 'pytest', 'setuptools', 'wheel', 'pip', 'black', 'flake8', 'mypy', 'ruff', 'tox'}
+
+_REQUIREMENT = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$')
+_JS_IMPORT = re.compile(r'''(?:\bfrom\s+|\brequire\s*\(\s*|\bimport\s*\(\s*|^\s*import\s+)['"]([^'"]+)['"]''', re.MULTILINE)
+_JS_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+
+
+def normalize_name(name):
+    """PEP 503 style normalization, with ``_`` as the separator so it doubles as an import name guess."""
+    return re.sub(r'[-_.]+', '_', name).lower()
+
+
+def _requirement(line):
+    """``(name, spec)`` for one PEP 508 requirement string, or None for options, URLs and blanks."""
+    line = line.split('#', 1)[0].split(';', 1)[0].strip()
+    if not line or line.startswith('-'):
+        return None
+    if ' @ ' in line:
+        return line.split(' @ ', 1)[0].strip(), line.split(' @ ', 1)[1].strip()
+    match = _REQUIREMENT.match(line)
+    if not match:
+        return None
+    return match.group(1), match.group(3).strip() or '*'
+
+
+def parse_requirements(text):
+    return [req for req in map(_requirement, text.splitlines()) if req]
+
+
+def parse_setup_py(text):
+    """Literal ``install_requires`` / ``extras_require`` of the ``setup()`` call, read without executing it."""
+    try:
+        tree = parse_python(text)
+    except SyntaxError:
+        return [], []
+    runtime, extras = [], []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and getattr(node.func, 'id', getattr(node.func, 'attr', None)) == 'setup'):
+            continue
+        for keyword in node.keywords:
+            try:
+                value = ast.literal_eval(keyword.value)
+            except ValueError:
+                continue
+            if keyword.arg == 'install_requires':
+                runtime += [req for req in map(_requirement, value) if req]
+            elif keyword.arg == 'extras_require' and isinstance(value, dict):
+                for requirements in value.values():
+                    extras += [req for req in map(_requirement, requirements) if req]
+    return runtime, extras
+
+
+def _load_toml(text):
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        return None
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError:
+        return None
+
+
+def parse_pyproject(text):
+    data = _load_toml(text) or {}
+    project = data.get('project', {})
+    runtime = [req for req in map(_requirement, project.get('dependencies', [])) if req]
+    extras = [req for group in project.get('optional-dependencies', {}).values() for req in map(_requirement, group) if req]
+
+    poetry = data.get('tool', {}).get('poetry', {})
+    for name, spec in poetry.get('dependencies', {}).items():
+        if name.lower() != 'python':
+            runtime.append((name, spec if isinstance(spec, str) else spec.get('version', '*')))
+    for group in poetry.get('group', {}).values():
+        for name, spec in group.get('dependencies', {}).items():
+            extras.append((name, spec if isinstance(spec, str) else spec.get('version', '*')))
+    return runtime, extras
+
+
+def parse_package_json(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [], []
+    runtime = list(data.get('dependencies', {}).items()) + list(data.get('peerDependencies', {}).items())
+    runtime += list(data.get('optionalDependencies', {}).items())
+    return runtime, list(data.get('devDependencies', {}).items())
+
+
+def parse_npm_lock(text):
+    """``{name: (version, [dependency names])}`` from package-lock.json / npm-shrinkwrap.json (v1-v3)."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    packages = {}
+    for path, info in data.get('packages', {}).items():
+        if path:
+            name = path.rsplit('node_modules/', 1)[-1]
+            packages.setdefault(name, (info.get('version'), list(info.get('dependencies', {}))))
+
+    def walk(dependencies):
+        for name, info in dependencies.items():
+            packages.setdefault(name, (info.get('version'), list(info.get('requires', {}))))
+            walk(info.get('dependencies', {}))
+
+    walk(data.get('dependencies', {}))
+    return packages
+
+
+def parse_yarn_lock(text):
+    """``{name: (version, [dependency names])}`` from a yarn v1 lock file."""
+    packages = {}
+    names, version, dependencies, in_dependencies = [], None, [], False
+    for line in text.splitlines() + ['']:
+        if line and not line.startswith(' ') and not line.startswith('#'):
+            for name in names:
+                packages.setdefault(name, (version, dependencies))
+            names = [spec.strip().strip('"').rsplit('@', 1)[0] for spec in line.rstrip(':').split(',')]
+            version, dependencies, in_dependencies = None, [], False
+        elif line.startswith('  version '):
+            version = line.split(None, 1)[1].strip('"')
+        elif line.strip() in ('dependencies:', 'optionalDependencies:'):
+            in_dependencies = True
+        elif in_dependencies and line.startswith('    '):
+            dependencies.append(line.split()[0].strip('"'))
+        elif not line.strip():
+            for name in names:
+                packages.setdefault(name, (version, dependencies))
+            names = []
+        else:
+            in_dependencies = False
+    return packages
+
+
+def parse_poetry_lock(text):
+    data = _load_toml(text) or {}
+    return {
+        package['name']: (package.get('version'), list(package.get('dependencies', {})))
+        for package in data.get('package', [])
+    }
+
+
+def parse_pipfile_lock(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    return {
+        name: ((info.get('version') or '').lstrip('='), [])
+        for section in ('default', 'develop') for name, info in data.get(section, {}).items()
+    }
+
+
+def python_imports(content):
+    """Absolute module names and ``(level, module, names)`` relative imports of a Python source."""
+    try:
+        tree = parse_python(content)
+    except SyntaxError:
+        return [], []
+    absolute, relative = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            absolute += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                relative.append((node.level, node.module or '', [alias.name for alias in node.names]))
+            elif node.module:
+                absolute.append(node.module)
+    return absolute, relative
+
+
+def _js_package(specifier):
+    if specifier.startswith(('.', '/')) or ':' in specifier:
+        return None
+    parts = specifier.split('/')
+    return '/'.join(parts[:2]) if specifier.startswith('@') else parts[0]
+
+
+def _module_name(rel_path):
+    parts = rel_path[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    return '.'.join(parts)
+
+
+def _count_cycles(graph):
+    """Number of strongly connected components with more than one module (Tarjan)."""
+    index, low, on_stack, stack, cycles = {}, {}, set(), [], 0
+    counter = [0]
+
+    def visit(node):
+        nonlocal cycles
+        work = [(node, iter(graph.get(node, ())))]
+        index[node] = low[node] = counter[0]
+        counter[0] += 1
+        stack.append(node)
+        on_stack.add(node)
+        while work:
+            current, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter[0]
+                    counter[0] += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph.get(child, ()))))
+                    break
+                if child in on_stack:
+                    low[current] = min(low[current], index[child])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[current])
+                if low[current] == index[current]:
+                    size = 0
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        size += 1
+                        if member == current:
+                            break
+                    if size > 1:
+                        cycles += 1
+
+    for node in list(graph):
+        if node not in index:
+            visit(node)
+    return cycles
+
+
+def _depth(roots, edges):
+    """Longest chain below the direct dependencies, ignoring cycles."""
+    depth = {}
+
+    def longest(name, seen):
+        if name in depth:
+            return depth[name]
+        seen = seen | {name}
+        result = 1 + max((longest(child, seen) for child in edges.get(name, ()) if child not in seen), default=0)
+        depth[name] = result
+        return result
+
+    return max((longest(root, frozenset()) for root in roots), default=0)
+
+
+def is_manifest(path):
+    """True for the manifests and lock files the resolver reads dependencies from."""
+    name = os.path.basename(path)
+    return name in MANIFEST_NAMES or (name.startswith('requirements') and name.endswith('.txt'))
+
+
+def resolve_dependencies(inventory):
+    """
+    Resolve the project's dependencies from manifests, lock files and imports.
+
+    :param inventory: The scanned FileInventory
+    :return: A dict with ``directDependencies``, ``transitiveDependencies``,
+        ``unusedDependencies``, ``dependencyGraphComplexity`` and ``metrics``
+    """
+    root = inventory.project_root
+    direct = {}
+    locked = {}
+    manifests = []
+    python_sources = {}
+    js_packages = set()
+    has_js = False
+
+    def relevant(path):
+        name = os.path.basename(path)
+        return name in MANIFEST_NAMES or name.endswith(('.txt', '.py') + _JS_EXTENSIONS)
+
+    records = inventory.select(relevant)
+    inventory.preload(records)
+    for record in records:
+        name = os.path.basename(record.path)
+        rel_path = os.path.relpath(record.path, root).replace(os.sep, '/')
+        is_requirements = name.startswith('requirements') and name.endswith('.txt')
+        if not (is_manifest(record.path) or name.endswith(('.py',) + _JS_EXTENSIONS)):
+            continue
+        content = record.content
+        if content is None:
+            continue
+
+        if is_manifest(record.path):
+            manifests.append(rel_path)
+        if is_requirements:
+            runtime, dev = parse_requirements(content), []
+        elif name == 'setup.py':
+            runtime, dev = parse_setup_py(content)
+        elif name == 'pyproject.toml':
+            runtime, dev = parse_pyproject(content)
+        elif name == 'package.json':
+            runtime, dev = parse_package_json(content)
+            for dep, spec in runtime + dev:
+                direct.setdefault(('npm', dep), {'name': dep, 'version': spec, 'ecosystem': 'npm', 'manifest': rel_path, 'dev': (dep, spec) in dev})
+            continue
+        else:
+            parser = {
+                'package-lock.json': parse_npm_lock, 'npm-shrinkwrap.json': parse_npm_lock,
+                'yarn.lock': parse_yarn_lock, 'poetry.lock': parse_poetry_lock, 'Pipfile.lock': parse_pipfile_lock,
+            }.get(name)
+            if parser is not None:
+                ecosystem = 'npm' if name in NODE_MANIFESTS else 'pypi'
+                for dep, (version, children) in parser(content).items():
+                    locked.setdefault((ecosystem, normalize_name(dep) if ecosystem == 'pypi' else dep), (dep, version, children))
+            elif name.endswith('.py'):
+                python_sources[rel_path] = content
+            else:
+                has_js = True
+                for specifier in _JS_IMPORT.findall(content):
+                    package = _js_package(specifier)
+                    if package:
+                        js_packages.add(package)
+            continue
+
+        for dep, spec in runtime + dev:
+            direct.setdefault(('pypi', normalize_name(dep)), {
+                'name': dep, 'version': spec, 'ecosystem': 'pypi', 'manifest': rel_path, 'dev': (dep, spec) in dev
+            })
+
+    # Transitive closure over the lock file edges
+    edges = {}
+    for (ecosystem, key), (_, _, children) in locked.items():
+        edges[(ecosystem, key)] = [(ecosystem, normalize_name(c) if ecosystem == 'pypi' else c) for c in children]
+    transitive = {}
+    frontier = [(key, key) for key in direct]
+    while frontier:
+        via, key = frontier.pop()
+        for child in edges.get(key, ()):
+            if child not in direct and child not in transitive and child in locked:
+                name, version, _ = locked[child]
+                transitive[child] = {'name': name, 'version': version, 'ecosystem': child[0], 'via': direct[via]['name']}
+                frontier.append((via, child))
+    for key, (name, version, _) in locked.items():
+        if key in direct:
+            direct[key]['locked'] = version
+
+    # Python import graph: internal modules and third-party top-level names
+    modules = {_module_name(path): path for path in python_sources}
+    top_level = {name.split('.')[0] for name in modules}
+    internal_edges = {}
+    imported_top = set()
+    for path, content in python_sources.items():
+        module = _module_name(path)
+        absolute, relative = python_imports(content)
+        targets = set()
+        for name in absolute:
+            head = name.split('.')[0]
+            if head in top_level or name in modules:
+                targets.add(name)
+            else:
+                imported_top.add(head)
+        package = module.split('.') if path.endswith('__init__.py') else module.split('.')[:-1]
+        for level, name, aliases in relative:
+            base = package[:len(package) - (level - 1)] if level > 1 else package
+            prefix = '.'.join(base + ([name] if name else []))
+            targets.update(f"{prefix}.{alias}" if f"{prefix}.{alias}" in modules else prefix for alias in aliases)
+        resolved = set()
+        for target in targets:
+            while target and target not in modules:
+                target = target.rpartition('.')[0]
+            if target and target != module:
+                resolved.add(target)
+        internal_edges[module] = resolved
+
+    unused = []
+    for (ecosystem, key), info in sorted(direct.items()):
+        if info['dev'] or key in NOT_IMPORTED:
+            continue
+        if ecosystem == 'pypi' and python_sources:
+            candidates = IMPORT_ALIASES.get(key, [key])
+            if not any(candidate in imported_top for candidate in candidates):
+                unused.append(info['name'])
+        elif ecosystem == 'npm' and has_js and info['name'] not in js_packages:
+            unused.append(info['name'])
+
+    fan_out = [len(children) for children in internal_edges.values()]
+    metrics = {
+        'manifests': sorted(manifests),
+        'directCount': len(direct),
+        'transitiveCount': len(transitive),
+        'dependencyDepth': _depth([key for key in direct if key in locked], edges),
+        'internalModules': len(modules),
+        'internalImportEdges': sum(fan_out),
+        'maxModuleFanOut': max(fan_out, default=0),
+        'importCycles': _count_cycles(internal_edges),
+        'undeclaredImports': sorted(
+            name for name in imported_top
+            if not any(name in IMPORT_ALIASES.get(key, [key]) for (_, key) in direct) and not _is_stdlib(name)
+        ) if direct else [],
+    }
+    complexity = (
+        f"{metrics['directCount']} direct and {metrics['transitiveCount']} transitive dependencies "
+        f"(max depth {metrics['dependencyDepth']}); {metrics['internalModules']} internal modules with "
+        f"{metrics['internalImportEdges']} import edges, max fan-out {metrics['maxModuleFanOut']}, "
+        f"{metrics['importCycles']} import cycle(s)"
+    )
+    return {
+        'directDependencies': list(direct.values()),
+        'transitiveDependencies': list(transitive.values()),
+        'unusedDependencies': unused,
+        'dependencyGraphComplexity': complexity,
+        'metrics': metrics,
+    }
+
+
+def _is_stdlib(name):
+    return name in getattr(sys, 'stdlib_module_names', ()) or name in sys.builtin_module_names or name == '__future__'
@@ -1,8 +1,9 @@
 import os
-from dotenv import load_dotenv, set_key
 
 def load_env_file(project_root):
     """Load the .env file from the project root."""
+    from dotenv import load_dotenv
+
     env_path = os.path.join(project_root, '.env')
     load_dotenv(env_path)
 
@@ -12,5 +13,7 @@ def get_api_key():
 
 def set_api_key(project_root, api_key):
     """Set the Butterfly API key in the .env file."""
+    from dotenv import set_key
+
     env_path = os.path.join(project_root, '.env')
     set_key(env_path, 'BUTTERFLY_API_KEY', api_key)
\ No newline at end of file
@@ -0,0 +1,202 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Returned instead of a set of paths when the backend lost track of events
+FULL_RESCAN = None
+
+
+class InotifyWatcher:
+    """Linux inotify backend; blocks in the kernel and costs nothing while the tree is idle."""
+
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}
+        self._add_tree(str(inventory.project_root))
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached; raise fs.inotify.max_user_watches")
+            return
+        self._watches[wd] = path
+
+    def _add_tree(self, top):
+        """Watch ``top`` and every non-ignored directory below it; return the files found."""
+        found = []
+        for root_dir, dirs, files in os.walk(top):
+            self._add_watch(root_dir)
+            dirs[:] = [d for d in dirs if not self.inventory.is_ignored(os.path.join(root_dir, d), True)]
+            found.extend(os.path.join(root_dir, f) for f in files)
+        return found
+
+    def wait(self, timeout=None):
+        """Block until events arrive; return the changed paths, or FULL_RESCAN after a queue overflow."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    return FULL_RESCAN
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not self.inventory.is_ignored(path, True):
+                        changed.update(self._add_tree(path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        # The directory's files are gone; refresh everything recorded under it
+                        prefix = path + os.sep
+                        changed.update(r.path for r in self.inventory if r.path.startswith(prefix))
+                    continue
+                if not self.inventory.is_ignored(path):
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Portable fallback that re-stats the tree every ``interval`` seconds and compares stat info.
+
+    The walk reuses the inventory's ignore rules instead of re-scanning the
+    project, so an idle tree costs one ``scandir`` pass per interval.
+    """
+
+    def __init__(self, inventory, interval=2.0):
+        self.inventory = inventory
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        """``{path: (mtime, size)}`` of every file the inventory does not ignore."""
+        engine = self.inventory.ignore_engine
+        snapshot = {}
+        pending = [(str(self.inventory.project_root), '')]
+        while pending:
+            directory, prefix = pending.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    rel_path = prefix + entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        # Ignored directories are pruned, so only the entry itself needs matching
+                        if engine is not None and engine.match(rel_path, is_dir):
+                            continue
+                        if is_dir:
+                            pending.append((entry.path, rel_path + '/'))
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_mtime, stat.st_size)
+                    except OSError:
+                        continue
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self._take_snapshot()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(inventory, poll_interval=2.0):
+    """Use inotify where available and fall back to polling everywhere else."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(inventory)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({str(e)}), falling back to polling")
+    return PollingWatcher(inventory, poll_interval)
+
+
+def watch_changes(watcher, debounce=2.0, max_delay=30.0):
+    """
+    Yield debounced batches of changed paths.
+
+    After the first event, further events are collected until the tree has
+    been quiet for ``debounce`` seconds (or ``max_delay`` has passed since the
+    burst started), so a save-all or a branch checkout triggers one run.
+    Yields FULL_RESCAN when the watcher lost events.
+    """
+    while True:
+        changed = watcher.wait()
+        if changed is FULL_RESCAN:
+            yield FULL_RESCAN
+            continue
+        if not changed:
+            continue
+
+        burst_end = time.monotonic() + max_delay
+        while True:
+            remaining = burst_end - time.monotonic()
+            if remaining <= 0:
+                break
+            more = watcher.wait(min(debounce, remaining))
+            if more is FULL_RESCAN:
+                changed = FULL_RESCAN
+                break
+            if not more:
+                break
+            changed |= more
+        yield changed
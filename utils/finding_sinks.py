@@ -0,0 +1,67 @@
+import json
+import queue
+import threading
+from rich.markup import escape
+
+DEFAULT_GUI_SERVICE_URL = 'http://127.0.0.1:8000'
+
+
+class ConsoleFindingSink:
+    """Print streamed findings as they arrive."""
+
+    def __init__(self, console):
+        self.console = console
+
+    def __call__(self, agent, category, item):
+        text = item if isinstance(item, str) else json.dumps(item)
+        self.console.print(f"[magenta]{agent}[/magenta] [cyan]{category}[/cyan]: {escape(text)}", highlight=False)
+
+
+class GuiFindingSink:
+    """
+    Forward streamed findings to the gui-service's ``/findings/`` endpoint.
+
+    Findings are queued and posted from a background thread so a slow or
+    absent GUI never stalls the model stream. If the service cannot be
+    reached the sink reports it once and drops further findings.
+    """
+
+    def __init__(self, base_url=DEFAULT_GUI_SERVICE_URL, timeout=2.0, max_pending=1000):
+        self.url = base_url.rstrip('/') + '/findings/'
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.available = True
+        self._thread = threading.Thread(target=self._worker, name="gui-findings", daemon=True)
+        self._thread.start()
+
+    def __call__(self, agent, category, item):
+        if not self.available:
+            return
+        try:
+            self.queue.put_nowait({"agent": agent, "category": category, "item": item})
+        except queue.Full:
+            pass
+
+    def _worker(self):
+        import requests  # deferred: only needed once findings are streamed
+
+        session = requests.Session()
+        while True:
+            finding = self.queue.get()
+            try:
+                session.post(self.url, json=finding, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"❌ gui-service unavailable, no longer forwarding findings: {e}")
+                self.available = False
+                return
+
+
+class FindingFanout:
+    """Send each finding to several sinks."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def __call__(self, agent, category, item):
+        for sink in self.sinks:
+            sink(agent, category, item)
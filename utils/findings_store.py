@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import sqlite3
+from datetime import datetime
+
+DEFAULT_FINDINGS_DB = 'root.db'
+
+FINDINGS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER,
+    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    overallProjectHealth TEXT,
+    overallSummary TEXT,
+    FOREIGN KEY(user_id) REFERENCES users(id)
+);
+CREATE TABLE IF NOT EXISTS agents (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT,
+    content_hash TEXT,
+    UNIQUE(path, content_hash)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER,
+    agent_id INTEGER,
+    file_id INTEGER,
+    category TEXT,
+    severity TEXT,
+    message TEXT,
+    FOREIGN KEY(run_id) REFERENCES runs(id),
+    FOREIGN KEY(agent_id) REFERENCES agents(id),
+    FOREIGN KEY(file_id) REFERENCES files(id)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_files_path ON files(path);
+CREATE INDEX IF NOT EXISTS idx_findings_run ON findings(run_id, agent_id);
+CREATE INDEX IF NOT EXISTS idx_findings_file ON findings(file_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings(severity, run_id);
+'''
+
+# Files without a content hash used to be stored with a NULL one, which UNIQUE(path, content_hash)
+# does not deduplicate; merge such rows per path and store '' instead
+NULL_HASH_MIGRATION = '''
+UPDATE findings SET file_id = (
+    SELECT MIN(g.id) FROM files AS f JOIN files AS g ON g.path = f.path AND g.content_hash IS NULL WHERE f.id = findings.file_id
+) WHERE file_id IN (SELECT id FROM files WHERE content_hash IS NULL);
+DELETE FROM files WHERE content_hash IS NULL AND id NOT IN (
+    SELECT MIN(id) FROM files WHERE content_hash IS NULL GROUP BY path
+);
+UPDATE files SET content_hash = '' WHERE content_hash IS NULL;
+'''
+
+# Paths looked up per query in _file_ids, well below SQLite's bound parameter limit
+FILE_ID_CHUNK = 500
+
+# Report fields are not graded by the model, so severity follows the category
+SEVERITY_BY_CATEGORY = {
+    'syntaxErrors': 'high',
+    'securityVulnerabilities': 'high',
+    'securityConsiderations': 'high',
+    'vulnerableDependenciesCount': 'high',
+    'potentialBugs': 'medium',
+    'potentialRuntimeErrors': 'medium',
+    'resourceLeaks': 'medium',
+    'concurrencyIssues': 'medium',
+    'licensingIssues': 'medium',
+    'potentialBottlenecks': 'medium',
+}
+
+_FILE_REFERENCE = re.compile(r'[\w./\\-]+\.\w+')
+
+
+def severity_for(category, value):
+    if not isinstance(value, list):
+        return 'info'
+    return SEVERITY_BY_CATEGORY.get(category, 'low')
+
+
+class FindingsStore:
+    """
+    Normalized, indexed analysis history in root.db.
+
+    A run is stored as one ``runs`` row plus one ``findings`` row per list
+    item or scalar assessment of each agent, linked to the file (path and
+    content hash) it mentions when that can be told. Everything is written
+    with ``executemany`` inside a single transaction. File paths are stored
+    absolute; files without a content hash (binary or unread) store ''.
+    """
+
+    def __init__(self, db_path=DEFAULT_FINDINGS_DB, project_root=None):
+        """
+        :param project_root: Directory relative paths given to ``findings_for_file`` are resolved against;
+            defaults to the directory holding the database
+        """
+        self.db_path = db_path
+        self.project_root = os.path.abspath(project_root or os.path.dirname(os.path.abspath(db_path)))
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(FINDINGS_SCHEMA)
+        if self.conn.execute('SELECT 1 FROM files WHERE content_hash IS NULL LIMIT 1').fetchone():
+            with self.conn:
+                self.conn.executescript(NULL_HASH_MIGRATION)
+
+    def close(self):
+        self.conn.close()
+
+    def _agent_ids(self, names):
+        self.conn.executemany('INSERT OR IGNORE INTO agents (name) VALUES (?)', [(name,) for name in names])
+        rows = self.conn.execute(
+            f"SELECT name, id FROM agents WHERE name IN ({','.join('?' * len(names))})", names
+        ).fetchall()
+        return dict(rows)
+
+    def _file_ids(self, files):
+        self.conn.executemany('INSERT OR IGNORE INTO files (path, content_hash) VALUES (?, ?)', files)
+        wanted = set(files)
+        paths = sorted({path for path, _ in files})
+        ids = {}
+        for start in range(0, len(paths), FILE_ID_CHUNK):
+            chunk = paths[start:start + FILE_ID_CHUNK]
+            for path, content_hash, file_id in self.conn.execute(
+                f"SELECT path, content_hash, id FROM files WHERE path IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                if (path, content_hash) in wanted:
+                    ids[(path, content_hash)] = file_id
+        return ids
+
+    @staticmethod
+    def _referenced_records(message, records_by_name):
+        """Inventory records whose file name (or project-relative path) appears in ``message``."""
+        matches = {}
+        for reference in _FILE_REFERENCE.findall(message):
+            reference = reference.replace('\\', '/')
+            if reference.startswith('./'):
+                reference = reference[2:]
+            for record in records_by_name.get(os.path.basename(reference), ()):
+                if '/' not in reference or record.path.replace(os.sep, '/').endswith('/' + reference):
+                    matches[record.path] = record
+        return list(matches.values())
+
+    def record_run(self, report, inventory=None, user_id=1):
+        """
+        Store a ManagerAgent report.
+
+        :param report: The structured report from ManagerAgent.analyze_codebase
+        :param inventory: The FileInventory the run analysed, used to link findings to files
+        :return: The id of the new run
+        """
+        records_by_name = {}
+        if inventory is not None:
+            for record in inventory:
+                records_by_name.setdefault(os.path.basename(record.path), []).append(record)
+
+        rows = []
+        for agent_name, result in report.items():
+            if hasattr(result, 'dict'):
+                result = result.dict()
+            if not isinstance(result, dict) or agent_name == 'agentErrors':
+                continue
+            for category, value in result.items():
+                items = value if isinstance(value, list) else [value]
+                for item in items:
+                    message = item if isinstance(item, str) else json.dumps(item)
+                    referenced = self._referenced_records(message, records_by_name) or [None]
+                    for record in referenced:
+                        file_key = (os.path.abspath(record.path), record.content_hash or '') if record is not None else None
+                        rows.append((agent_name, file_key, category, severity_for(category, value), message))
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (user_id, started_at, overallProjectHealth, overallSummary) VALUES (?, ?, ?, ?)',
+                (user_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                 report.get('overallProjectHealth'), report.get('overallSummary'))
+            )
+            run_id = cursor.lastrowid
+            agent_ids = self._agent_ids(sorted({row[0] for row in rows})) if rows else {}
+            file_ids = self._file_ids(sorted({row[1] for row in rows if row[1] is not None}))
+            self.conn.executemany(
+                'INSERT INTO findings (run_id, agent_id, file_id, category, severity, message) VALUES (?, ?, ?, ?, ?, ?)',
+                [(run_id, agent_ids[agent], file_ids.get(file_key), category, severity, message)
+                 for agent, file_key, category, severity, message in rows]
+            )
+        return run_id
+
+    def recent_runs(self, limit=50):
+        return [dict(zip(('id', 'started_at', 'overallProjectHealth', 'overallSummary'), row)) for row in self.conn.execute(
+            'SELECT id, started_at, overallProjectHealth, overallSummary FROM runs ORDER BY started_at DESC, id DESC LIMIT ?',
+            (limit,)
+        )]
+
+    def findings_for_file(self, path, last_runs=50, severity=None):
+        """
+        Findings that mention ``path`` across the last ``last_runs`` runs, newest first.
+
+        :param path: Absolute, or relative to the project root
+        """
+        query = '''
+        SELECT r.id, r.started_at, a.name, f.content_hash, x.category, x.severity, x.message
+        FROM findings x
+        JOIN files f ON f.id = x.file_id
+        JOIN agents a ON a.id = x.agent_id
+        JOIN runs r ON r.id = x.run_id
+        WHERE f.path = ?
+          AND x.run_id IN (SELECT id FROM runs ORDER BY started_at DESC, id DESC LIMIT ?)
+        '''
+        params = [os.path.abspath(os.path.join(self.project_root, path)), last_runs]
+        if severity is not None:
+            query += ' AND x.severity = ?'
+            params.append(severity)
+        query += ' ORDER BY r.started_at DESC, r.id DESC'
+        columns = ('run_id', 'started_at', 'agent', 'content_hash', 'category', 'severity', 'message')
+        return [dict(zip(columns, row)) for row in self.conn.execute(query, params)]
+
+    def findings_for_run(self, run_id, severity=None):
+        query = '''
+        SELECT a.name, f.path, x.category, x.severity, x.message
+        FROM findings x
+        JOIN agents a ON a.id = x.agent_id
+        LEFT JOIN files f ON f.id = x.file_id
+        WHERE x.run_id = ?
+        '''
+        params = [run_id]
+        if severity is not None:
+            query += ' AND x.severity = ?'
+            params.append(severity)
+        columns = ('agent', 'path', 'category', 'severity', 'message')
+        return [dict(zip(columns, row)) for row in self.conn.execute(query, params)]
+
+    def severity_counts(self, last_runs=50):
+        """Per-run finding counts by severity, for trend dashboards."""
+        rows = self.conn.execute('''
+        SELECT x.run_id, x.severity, COUNT(*)
+        FROM findings x
+        WHERE x.run_id IN (SELECT id FROM runs ORDER BY started_at DESC, id DESC LIMIT ?)
+        GROUP BY x.run_id, x.severity
+        ''', (last_runs,)).fetchall()
+        counts = {}
+        for run_id, severity, count in rows:
+            counts.setdefault(run_id, {})[severity] = count
+        return counts
@@ -0,0 +1,146 @@
+import os
+import json
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_HISTORY_PATH = 'history.jsonl'
+
+_OFFSET = struct.Struct('<Q')
+
+
+def _default(obj):
+    # Agent results are pydantic models
+    if hasattr(obj, 'dict'):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class HistoryStore:
+    """
+    Append-only analysis history stored as JSON Lines.
+
+    Each report is one line, written with a single ``O_APPEND`` write and
+    fsynced, so appending costs O(1) regardless of history length and a crash
+    can at worst leave a torn last line, which is cut off on the next open. A
+    side file of fixed-width byte offsets (``<path>.idx``) makes reading the
+    last N reports a pair of seeks instead of a scan.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.index_path = path + '.idx'
+        self._lock = threading.Lock()
+        for p in (self.path, self.index_path):
+            if not os.path.exists(p):
+                open(p, 'ab').close()
+        self._recover()
+
+    def _recover(self):
+        size = os.path.getsize(self.path)
+        if size:
+            with open(self.path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Cut off a torn final line left by a crash mid-append
+                    f.seek(0)
+                    size = f.read().rfind(b'\n') + 1
+                    f.truncate(size)
+
+        if not self._index_consistent(size):
+            self.rebuild_index()
+
+    def _index_consistent(self, size):
+        index_size = os.path.getsize(self.index_path)
+        if index_size % _OFFSET.size:
+            return False
+        if index_size == 0:
+            return size == 0
+        with open(self.index_path, 'rb') as index:
+            index.seek(-_OFFSET.size, os.SEEK_END)
+            last = _OFFSET.unpack(index.read(_OFFSET.size))[0]
+        if last >= size:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(last)
+            return last + len(f.readline()) == size
+
+    def rebuild_index(self):
+        with self._lock, open(self.path, 'rb') as f, open(self.index_path, 'wb') as index:
+            offset = 0
+            for line in f:
+                index.write(_OFFSET.pack(offset))
+                offset += len(line)
+            index.flush()
+            os.fsync(index.fileno())
+
+    def __len__(self):
+        return os.path.getsize(self.index_path) // _OFFSET.size
+
+    def append(self, report):
+        """Append one report and return its position in the history."""
+        line = (json.dumps(report, default=_default) + '\n').encode('utf-8')
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                offset = os.lseek(fd, 0, os.SEEK_END)
+                os.write(fd, line)
+                os.fsync(fd)
+                with open(self.index_path, 'ab') as index:
+                    index.write(_OFFSET.pack(offset))
+                    index.flush()
+                    os.fsync(index.fileno())
+            finally:
+                os.close(fd)
+        return len(self) - 1
+
+    def iter_reports(self, start=0):
+        """Stream reports from position ``start`` onwards without loading the whole history."""
+        if start >= len(self):
+            return
+        with open(self.index_path, 'rb') as index:
+            index.seek(start * _OFFSET.size)
+            offset = _OFFSET.unpack(index.read(_OFFSET.size))[0]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                yield json.loads(line)
+
+    def tail(self, n):
+        """Return the last ``n`` reports, oldest first."""
+        return list(self.iter_reports(max(0, len(self) - n)))
+
+    def latest(self):
+        reports = self.tail(1)
+        return reports[0] if reports else None
+
+    def migrate_json_file(self, json_path):
+        """
+        Import reports from a legacy ``json.json`` file.
+
+        The file may hold a list of reports or a single report object.
+        Returns the number of reports imported.
+        """
+        with open(json_path, 'r') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return 0
+        reports = data if isinstance(data, list) else [data]
+        for report in reports:
+            self.append(report)
+        return len(reports)
+
+
+def open_history(path=DEFAULT_HISTORY_PATH, legacy_json_path='json.json'):
+    """Open the history store, importing the legacy json.json the first time."""
+    store = HistoryStore(path)
+    if len(store) == 0 and legacy_json_path and os.path.exists(legacy_json_path):
+        store.migrate_json_file(legacy_json_path)
+    return store
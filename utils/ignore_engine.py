@@ -0,0 +1,146 @@
+import os
+import re
+
+IGNORE_FILES = ('.gitignore', '.butterflyignore')
+
+
+def _translate(glob):
+    """Translate a gitignore-style glob into a regular expression fragment."""
+    i, n = 0, len(glob)
+    out = []
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = glob.find(']', i + 2)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreEngine:
+    """
+    Gitignore-style path matcher.
+
+    Patterns are compiled into two alternations (one for directories, one
+    for files) with the most recently added pattern first, so a single
+    ``re.match`` finds the last matching rule and tells whether it was a
+    negation. Paths are project-relative and use ``/`` as separator.
+    """
+
+    def __init__(self, patterns=None):
+        self._rules = []
+        self._dir_regex = None
+        self._file_regex = None
+        if patterns:
+            self.add_patterns(patterns)
+
+    def add_patterns(self, lines, base=''):
+        """Add gitignore lines; ``base`` is the directory the lines are relative to."""
+        for line in lines:
+            rule = self._parse(line, base)
+            if rule:
+                self._rules.append(rule)
+        self._dir_regex = None
+        self._file_regex = None
+
+    def add_ignore_file(self, path, base=''):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.add_patterns(f.read().splitlines(), base)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading ignore file {path}: {str(e)}")
+
+    @staticmethod
+    def _parse(line, base):
+        line = line.rstrip('\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            return None
+
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+
+        # A slash anywhere but the end anchors the pattern to its base directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        regex = _translate(line)
+        if not anchored:
+            regex = '(?:.*/)?' + regex
+        if base:
+            regex = re.escape(base.strip('/') + '/') + regex
+        return regex, negate, dir_only
+
+    def _compile(self, include_dir_only):
+        alternatives = []
+        for index in range(len(self._rules) - 1, -1, -1):
+            regex, negate, dir_only = self._rules[index]
+            if dir_only and not include_dir_only:
+                continue
+            name = f"{'n' if negate else 'i'}{index}"
+            alternatives.append(f'(?P<{name}>{regex})')
+        if not alternatives:
+            return None
+        return re.compile('(?:' + '|'.join(alternatives) + r')\Z', re.DOTALL)
+
+    def match(self, rel_path, is_dir=False):
+        """Return True if ``rel_path`` itself is ignored (ancestors are not checked)."""
+        if is_dir:
+            if self._dir_regex is None:
+                self._dir_regex = self._compile(True) or False
+            regex = self._dir_regex
+        else:
+            if self._file_regex is None:
+                self._file_regex = self._compile(False) or False
+            regex = self._file_regex
+        if not regex:
+            return False
+        m = regex.match(rel_path)
+        return bool(m) and m.lastgroup[0] == 'i'
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Return True if ``rel_path`` or any of its parent directories is ignored."""
+        parts = rel_path.strip('/').split('/')
+        for i in range(1, len(parts)):
+            if self.match('/'.join(parts[:i]), True):
+                return True
+        return self.match(rel_path.strip('/'), is_dir)
+
+
+def load_ignore_engine(project_root, patterns=None):
+    """Build an engine from config patterns plus the ignore files at the project root."""
+    engine = IgnoreEngine(patterns)
+    for name in IGNORE_FILES:
+        path = os.path.join(project_root, name)
+        if os.path.isfile(path):
+            engine.add_ignore_file(path)
+    return engine
@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from .response_cache import DEFAULT_CACHE_PATH
+from .analysis_merge import item_key, dedupe_items
+
+
+def python_dependents(changed, candidates):
+    """Return the candidate records that import a module changed in ``changed``."""
+    stems = {os.path.splitext(os.path.basename(r.path))[0] for r in changed if r.path.endswith('.py')}
+    stems.discard('__init__')
+    if not stems:
+        return []
+    names = '|'.join(re.escape(stem) for stem in sorted(stems))
+    pattern = re.compile(
+        rf'^\s*(?:from\s+[\w.]*\b(?:{names})\b[\w.]*\s+import|import\s+[\w., ]*\b(?:{names})\b)',
+        re.MULTILINE
+    )
+    return [r for r in candidates if r.path.endswith('.py') and r.content and pattern.search(r.content)]
+
+
+class IncrementalStore:
+    """
+    Remembers, per agent, the files it last analysed and what was found in them.
+
+    On each run the agent's selected files are diffed against the stored
+    snapshot (mtime and size first, content hash only when those moved), and
+    only added or modified files plus up to ``dependent_depth`` levels of
+    Python importers are sent to the model. The new findings are merged into
+    the previous report: list items attributed to re-analysed or deleted
+    files are replaced, every other item is kept, and scalar assessments
+    take the newest value.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, dependent_depth=1):
+        self.dependent_depth = dependent_depth
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS incremental_files (
+            agent TEXT,
+            path TEXT,
+            mtime REAL,
+            size INTEGER,
+            content_hash TEXT,
+            findings TEXT,
+            PRIMARY KEY (agent, path)
+        )''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS incremental_reports (
+            agent TEXT PRIMARY KEY,
+            report TEXT,
+            updated_at REAL
+        )''')
+        self._conn.commit()
+
+    def _load(self, agent_name):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT path, mtime, size, content_hash, findings FROM incremental_files WHERE agent = ?', (agent_name,)
+            ).fetchall()
+            report = self._conn.execute(
+                'SELECT report FROM incremental_reports WHERE agent = ?', (agent_name,)
+            ).fetchone()
+        files = {path: (mtime, size, content_hash, json.loads(findings)) for path, mtime, size, content_hash, findings in rows}
+        return files, json.loads(report[0]) if report else None
+
+    def _save(self, agent_name, files, report, removed):
+        with self._lock:
+            self._conn.executemany(
+                'DELETE FROM incremental_files WHERE agent = ? AND path = ?',
+                [(agent_name, path) for path in removed]
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO incremental_files (agent, path, mtime, size, content_hash, findings) VALUES (?, ?, ?, ?, ?, ?)',
+                [(agent_name, path, mtime, size, content_hash, json.dumps(findings)) for path, (mtime, size, content_hash, findings) in files.items()]
+            )
+            if report is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO incremental_reports (agent, report, updated_at) VALUES (?, ?, ?)',
+                    (agent_name, json.dumps(report), time.time())
+                )
+            self._conn.commit()
+
+    def reset(self, agent_name=None):
+        """Forget stored state so the next run analyses everything again."""
+        with self._lock:
+            if agent_name is None:
+                self._conn.execute('DELETE FROM incremental_files')
+                self._conn.execute('DELETE FROM incremental_reports')
+            else:
+                self._conn.execute('DELETE FROM incremental_files WHERE agent = ?', (agent_name,))
+                self._conn.execute('DELETE FROM incremental_reports WHERE agent = ?', (agent_name,))
+            self._conn.commit()
+
+    def analyze(self, agent, records):
+        """
+        Analyse ``records`` with ``agent``, sending only what changed since the last run.
+
+        :param agent: A BaseAgent subclass instance
+        :param records: The FileRecords the agent selected from the inventory
+        :return: The merged analysis model, or None if the model reported nothing
+        """
+        agent_name = agent.tool_name
+        previous_files, previous_report = self._load(agent_name)
+
+        changed = []
+        unchanged = []
+        touched = {}
+        for record in records:
+            old = previous_files.get(record.path)
+            if old and old[0] == record.mtime and old[1] == record.size:
+                unchanged.append(record)
+                continue
+            if record.content is None:
+                continue
+            if old and old[2] == record.content_hash:
+                # Touched but not edited; refresh the stat info only
+                touched[record.path] = (record.mtime, record.size, old[2], old[3])
+                unchanged.append(record)
+                continue
+            changed.append(record)
+
+        current_paths = {record.path for record in records}
+        removed = [path for path in previous_files if path not in current_paths]
+
+        if previous_report is None:
+            # Nothing to merge into yet, so the first run covers every file
+            changed = [record for record in records if record.content is not None]
+            unchanged = []
+        elif not changed and not removed:
+            if touched:
+                self._save(agent_name, touched, None, [])
+            return agent.analysis_model.parse_obj(previous_report)
+
+        dependents = self._dependents(changed, unchanged)
+        to_send = changed + dependents
+        stale_paths = [record.path for record in to_send] + removed
+        stale = {}
+        for path in stale_paths:
+            for field, items in previous_files.get(path, (None, None, None, {}))[3].items():
+                stale.setdefault(field, set()).update(items)
+
+        if to_send:
+            result = agent.request_analysis([r.path for r in to_send], [r.content for r in to_send])
+            if result is None:
+                return agent.analysis_model.parse_obj(previous_report) if previous_report else None
+            new_report = result.dict()
+        else:
+            new_report = {}
+
+        merged = self._merge(previous_report, stale, new_report)
+        files = dict(touched)
+        files.update(self._attribute(to_send, new_report))
+        self._save(agent_name, files, merged, removed)
+        return agent.analysis_model.parse_obj(merged)
+
+    def analyze_whole(self, agent, records, analyze):
+        """
+        Analyse ``records`` as one unit: reuse the stored report while none of them changed, else call ``analyze()``.
+
+        For agents whose result cannot be attributed to single files (e.g.
+        the dependency summary). Files are compared as in :meth:`analyze`.
+
+        :param analyze: Returns the agent's analysis model for the current files, or None
+        """
+        agent_name = agent.tool_name
+        previous_files, previous_report = self._load(agent_name)
+        current = {}
+        for record in records:
+            old = previous_files.get(record.path)
+            if old and old[0] == record.mtime and old[1] == record.size:
+                current[record.path] = old
+            else:
+                current[record.path] = (record.mtime, record.size, record.content_hash, {})
+
+        if previous_report is not None and current.keys() == previous_files.keys() and all(
+            entry[2] == previous_files[path][2] for path, entry in current.items()
+        ):
+            touched = {path: entry for path, entry in current.items() if entry[:2] != previous_files[path][:2]}
+            if touched:
+                self._save(agent_name, touched, None, [])
+            return agent.analysis_model.parse_obj(previous_report)
+
+        result = analyze()
+        if result is None:
+            return None
+        removed = [path for path in previous_files if path not in current]
+        self._save(agent_name, current, result.dict(), removed)
+        return result
+
+    def _dependents(self, changed, unchanged):
+        dependents = []
+        frontier = changed
+        remaining = list(unchanged)
+        for _ in range(self.dependent_depth):
+            found = python_dependents(frontier, remaining)
+            if not found:
+                break
+            dependents.extend(found)
+            found_paths = {record.path for record in found}
+            remaining = [record for record in remaining if record.path not in found_paths]
+            frontier = found
+        return dependents
+
+    @staticmethod
+    def _attribute(records, report):
+        """
+        Map each list item of ``report`` to the files it mentions.
+
+        Items naming none of the files are attributed to all of them, so they
+        are dropped as soon as any file of the batch is analysed again.
+        """
+        files = {record.path: {} for record in records}
+        names = {record.path: os.path.basename(record.path) for record in records}
+        for field, items in report.items():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                key = item_key(item)
+                owners = [path for path, name in names.items() if path in key or name in key] or list(files)
+                for path in owners:
+                    files[path].setdefault(field, []).append(key)
+        return {
+            record.path: (record.mtime, record.size, record.content_hash, files[record.path])
+            for record in records
+        }
+
+    @staticmethod
+    def _merge(previous_report, stale, new_report):
+        if not previous_report:
+            return new_report
+
+        merged = dict(previous_report)
+        for field, value in previous_report.items():
+            if isinstance(value, list):
+                kept = [item for item in value if item_key(item) not in stale.get(field, ())]
+                merged[field] = dedupe_items(kept + new_report.get(field, []))
+            elif isinstance(value, dict):
+                merged[field] = {**value, **new_report.get(field, {})}
+            elif field in new_report:
+                merged[field] = new_report[field]
+        return merged
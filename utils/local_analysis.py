@@ -0,0 +1,183 @@
+import io
+import os
+import ast
+import tokenize
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .ast_parse import parse as parse_python
+
+# StaticAnalysis fields the local pass answers for Python files
+LOCAL_FIELDS = ('syntaxErrors', 'unusedCode', 'complexityIssues', 'antiPatterns')
+
+DEFAULT_COMPLEXITY_THRESHOLD = 10
+
+# Below this many files the process pool costs more than it saves
+MIN_FILES_FOR_POOL = 16
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+_SCOPES = _FUNCTIONS + (ast.ClassDef,)
+_BRANCHES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert)
+
+
+def _walk_scope(node):
+    """Yield the nodes of ``node``'s own scope, without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, _SCOPES):
+            stack.extend(ast.iter_child_nodes(child))
+
+
+def cyclomatic_complexity(func):
+    """McCabe complexity of one function: 1 plus one per decision point."""
+    complexity = 1
+    for node in _walk_scope(func):
+        if isinstance(node, _BRANCHES):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            complexity += 1 + len(node.ifs)
+        elif isinstance(node, ast.match_case):
+            complexity += 1
+    return complexity
+
+
+def _noqa_lines(content):
+    """Lines carrying a ``# noqa`` comment, read with tokenize so strings are not mistaken for comments."""
+    lines = set()
+    for token in tokenize.generate_tokens(io.StringIO(content).readline):
+        if token.type == tokenize.COMMENT and 'noqa' in token.string.lower():
+            lines.add(token.start[0])
+    return lines
+
+
+def _unused_imports(path, tree, noqa):
+    imported = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported[alias.asname or alias.name.split('.')[0]] = (node.lineno, alias.name)
+        elif isinstance(node, ast.ImportFrom) and node.module != '__future__':
+            for alias in node.names:
+                if alias.name != '*':
+                    imported[alias.asname or alias.name] = (node.lineno, f"{node.module or ''}.{alias.name}".lstrip('.'))
+
+    used = set()
+    exported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store):
+            used.add(node.id)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == '__all__' for t in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                exported.update(elt.value for elt in node.value.elts if isinstance(elt, ast.Constant))
+
+    return [
+        f"{path}:{lineno}: '{name}' imported but unused"
+        for alias, (lineno, name) in sorted(imported.items(), key=lambda item: item[1][0])
+        if alias not in used and alias not in exported and lineno not in noqa
+    ]
+
+
+def _unused_locals(path, tree):
+    """Plain ``name = value`` assignments in a function whose name is never read (loop and unpacking targets are left alone)."""
+    findings = []
+    for func in ast.walk(tree):
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        assigned = {}
+        for node in _walk_scope(func):
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, ast.AnnAssign) and node.value is not None:
+                targets = [node.target]
+            else:
+                continue
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    assigned.setdefault(target.id, target.lineno)
+
+        loaded = set()
+        declared = set()
+        for node in ast.walk(func):  # nested functions may read the name as a closure
+            if isinstance(node, (ast.Global, ast.Nonlocal)):
+                declared.update(node.names)
+            elif isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store):
+                loaded.add(node.id)
+        if 'locals' in loaded or 'vars' in loaded:
+            continue
+        for name, lineno in sorted(assigned.items(), key=lambda item: item[1]):
+            if name not in loaded and name not in declared and not name.startswith('_'):
+                findings.append(f"{path}:{lineno}: local variable '{name}' in {func.name}() is assigned but never used")
+    return findings
+
+
+def analyze_python_source(path, content, complexity_threshold=DEFAULT_COMPLEXITY_THRESHOLD):
+    """
+    Deterministic findings for one Python file.
+
+    :return: A dict with the LOCAL_FIELDS lists of StaticAnalysis
+    """
+    findings = {field: [] for field in LOCAL_FIELDS}
+    try:
+        tree = parse_python(content, filename=path)
+        noqa = _noqa_lines(content)
+    except SyntaxError as e:
+        findings['syntaxErrors'].append(f"{path}:{e.lineno}: {e.msg}")
+        return findings
+    except (tokenize.TokenError, ValueError) as e:
+        findings['syntaxErrors'].append(f"{path}: {e}")
+        return findings
+
+    if os.path.basename(path) != '__init__.py':  # imports in packages are usually re-exports
+        findings['unusedCode'].extend(_unused_imports(path, tree, noqa))
+    findings['unusedCode'].extend(_unused_locals(path, tree))
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            complexity = cyclomatic_complexity(node)
+            if complexity > complexity_threshold:
+                findings['complexityIssues'].append(
+                    f"{path}:{node.lineno}: {node.name}() has cyclomatic complexity {complexity} (threshold {complexity_threshold})"
+                )
+        elif isinstance(node, ast.ExceptHandler) and node.type is None and node.lineno not in noqa:
+            findings['antiPatterns'].append(
+                f"{path}:{node.lineno}: bare 'except:' also catches SystemExit and KeyboardInterrupt"
+            )
+    return findings
+
+
+def _analyze_one(args):
+    return analyze_python_source(*args)
+
+
+def run_local_analysis(file_paths, file_contents, max_workers=None, complexity_threshold=DEFAULT_COMPLEXITY_THRESHOLD):
+    """
+    Run the local pass over the Python files among ``file_paths``.
+
+    Files are spread over a process pool (the work is CPU-bound and holds the
+    GIL); small inputs are analysed in-process.
+
+    :return: A dict with the combined LOCAL_FIELDS lists
+    """
+    jobs = [(path, content, complexity_threshold)
+            for path, content in zip(file_paths, file_contents) if path.endswith('.py') and content is not None]
+    if len(jobs) < MIN_FILES_FOR_POOL or max_workers == 1:
+        results = map(_analyze_one, jobs)
+    else:
+        chunksize = max(1, len(jobs) // (4 * (max_workers or os.cpu_count() or 1)))
+        try:
+            # spawn: agents call this from worker threads, where forking is unsafe
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(_analyze_one, jobs, chunksize=chunksize))
+        except (BrokenProcessPool, RuntimeError, OSError):
+            # e.g. an unguarded __main__ that cannot be re-imported by the workers
+            results = map(_analyze_one, jobs)
+
+    combined = {field: [] for field in LOCAL_FIELDS}
+    for result in results:
+        for field in LOCAL_FIELDS:
+            combined[field].extend(result[field])
+    return combined
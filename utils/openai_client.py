@@ -0,0 +1,140 @@
+import os
+import threading
+from .rate_limiter import RateLimiter, RetryPolicy
+
+_clients = {}
+_owned = set()  # names whose client the registry built (and may close)
+_lock = threading.Lock()
+_env_loaded = False
+
+# Shared HTTP transport and request policy; see configure_transport
+_settings = {
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 60.0,
+    'timeout': 600.0,
+    'connect_timeout': 10.0,
+}
+_limiter = RateLimiter()
+_retry_policy = RetryPolicy(limiter=_limiter)
+
+
+def load_environment():
+    """Load .env once, the first time something actually needs it."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def configure_transport(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0, timeout=600.0,
+                        max_retries=5, requests_per_minute=None, tokens_per_minute=None):
+    """
+    Tune the shared transport, retry policy and rate limits.
+
+    Clients built by the registry afterwards use the new connection limits;
+    the rate limiter and retry policy apply to every request made through
+    ``create_completion``.
+
+    :param max_connections: Upper bound on open connections to the API across all agents
+    :param max_keepalive_connections: Idle connections kept alive for reuse
+    :param keepalive_expiry: Seconds an idle connection is kept
+    :param timeout: Read timeout of a single request in seconds
+    :param max_retries: Retries of a transient failure (429, 5xx, connection errors)
+    :param requests_per_minute: Client-side RPM limit, or None for no limit
+    :param tokens_per_minute: Client-side TPM limit, or None for no limit
+    """
+    global _limiter, _retry_policy
+    with _lock:
+        _settings.update(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            timeout=timeout,
+        )
+        _limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        _retry_policy = RetryPolicy(max_retries=max_retries, limiter=_limiter)
+        for name in _owned:
+            _clients[name].close()
+        _owned.clear()
+        _clients.clear()
+
+
+def _build_client():
+    import importlib
+    from openai import OpenAI, DefaultHttpxClient
+
+    # Limits/Timeout must come from the HTTP library the SDK's client is built on (httpx or a fork of it)
+    httpx = importlib.import_module(DefaultHttpxClient.__mro__[1].__module__.split('.')[0])
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=_settings['max_connections'],
+            max_keepalive_connections=_settings['max_keepalive_connections'],
+            keepalive_expiry=_settings['keepalive_expiry'],
+        ),
+        timeout=httpx.Timeout(_settings['timeout'], connect=_settings['connect_timeout']),
+    )
+    # Retries are handled by our RetryPolicy so they are coordinated with the rate limiter
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+
+
+def get_client(name="default"):
+    """
+    Return the shared OpenAI client registered under ``name``, creating it on first use.
+
+    The openai/httpx stack is only imported here, so importing the agents
+    (or running ``butterfly --help``) does not pay for it. All agents share
+    the client and with it one keep-alive connection pool.
+    """
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            load_environment()
+            client = _build_client()
+            _clients[name] = client
+            _owned.add(name)
+        return client
+
+
+def register_client(client, name="default"):
+    """Use ``client`` for ``name`` instead of building one (e.g. a stand-in server in tests)."""
+    with _lock:
+        _clients[name] = client
+        _owned.discard(name)
+
+
+def reset_clients():
+    with _lock:
+        _clients.clear()
+        _owned.clear()
+
+
+def get_rate_limiter():
+    return _limiter
+
+
+def get_retry_policy():
+    return _retry_policy
+
+
+def create_completion(client, estimated_tokens=0, **request):
+    """
+    ``client.chat.completions.create(**request)`` under the shared rate limiter and retry policy.
+
+    :param estimated_tokens: Prompt plus expected completion tokens, charged against the TPM limit up front
+    """
+    if getattr(client, 'batched', False):
+        # Batch API requests (see BatchClient) do not count against the real-time limits
+        return client.chat.completions.create(**request)
+
+    limiter, retry_policy = _limiter, _retry_policy
+
+    def attempt():
+        limiter.acquire(estimated_tokens)
+        return client.chat.completions.create(**request)
+
+    response = retry_policy.call(attempt)
+    usage = getattr(response, 'usage', None)
+    limiter.reconcile(estimated_tokens, getattr(usage, 'total_tokens', None))
+    return response
@@ -0,0 +1,154 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+# Status codes worth another attempt: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {'APIConnectionError', 'APITimeoutError', 'ConnectError', 'ReadTimeout', 'RemoteProtocolError'}
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at ``rate_per_minute``.
+
+    ``acquire`` blocks until enough tokens are available. Requests larger
+    than the bucket are clamped to its capacity so they can still pass once
+    the bucket is full. The level may go negative when ``consume`` records
+    usage that turned out higher than estimated, which delays later callers.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity or rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                self._cond.wait((amount - self.level) / self.rate)
+
+    def consume(self, amount):
+        """Adjust the level without waiting; a negative ``amount`` gives tokens back."""
+        with self._cond:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    """
+    Client-side RPM/TPM limiter shared by every agent in the process.
+
+    Each request takes one request token and its estimated prompt plus
+    completion tokens before it is sent; ``reconcile`` corrects the token
+    bucket with the usage the API reports. ``pause`` holds every caller back,
+    e.g. for the Retry-After of a 429, so concurrent agents do not keep
+    hitting the limit one after another.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, estimated_tokens=0):
+        while True:
+            with self._lock:
+                delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        if self.requests is not None:
+            self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.consume(actual_tokens - min(estimated_tokens, self.tokens.capacity))
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (``retry-after-ms`` or ``retry-after``), or None."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+class RetryPolicy:
+    """
+    Retries transient model API failures with jittered exponential backoff.
+
+    The n-th retry waits a random time up to ``min(max_delay, base_delay * 2**n)``
+    ("full jitter"), or the server's Retry-After when it sent one. Rate-limit
+    waits are passed on to the RateLimiter so other threads back off too.
+    """
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=60.0, limiter=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = limiter
+
+    def delay(self, attempt, error):
+        requested = retry_after(error)
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.delay(attempt, e)
+                if getattr(e, 'status_code', None) == 429 and self.limiter is not None:
+                    self.limiter.pause(delay)
+                time.sleep(delay)
+                attempt += 1
@@ -0,0 +1,108 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = 'cache.db'
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of parsed agent results.
+
+    Entries are keyed on everything that determines a model answer (system
+    prompt, instruction, tool schema, model name and the hash of every input
+    file), so an unchanged codebase never reaches the API twice. Old entries
+    are evicted by age and the cache is trimmed to ``max_bytes``, least
+    recently used first.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            tool_name TEXT,
+            result TEXT,
+            size INTEGER,
+            created_at REAL,
+            last_used REAL
+        )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache (last_used)')
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, system_prompt, instruction, tools, file_paths, file_contents):
+        """Hash the prompt, tool schema, model name and input file contents into a cache key."""
+        digest = hashlib.sha256()
+        for part in (model, system_prompt or '', instruction or '', json.dumps(tools, sort_keys=True)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        for path, content in sorted(zip(file_paths, file_contents)):
+            digest.update(path.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(hashlib.sha256(content.encode('utf-8')).digest())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached result JSON for ``key``, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result, created_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.max_age:
+                self._conn.execute('UPDATE response_cache SET last_used = ? WHERE key = ?', (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, tool_name, result):
+        """Store the result JSON for ``key`` and evict entries past the age or size limits."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, tool_name, result, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, tool_name, result, len(result), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute('DELETE FROM response_cache WHERE created_at < ?', (now - self.max_age,))
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT key, size FROM response_cache ORDER BY last_used DESC').fetchall()
+        kept = 0
+        stale = []
+        for key, size in rows:
+            kept += size
+            if kept > self.max_bytes:
+                stale.append((key,))
+        self._conn.executemany('DELETE FROM response_cache WHERE key = ?', stale)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache')
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache'
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,279 @@
+import os
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .config_manager import load_config
+from .ignore_engine import IGNORE_FILES, load_ignore_engine
+from .telemetry import span
+
+DEFAULT_MAX_READ_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 256 * 1024 * 1024
+DEFAULT_LOAD_WORKERS = 8
+
+# Bytes sniffed for a NUL to tell binary files apart, and the size from which files are mmapped
+SNIFF_BYTES = 8192
+MMAP_THRESHOLD = 1024 * 1024
+
+
+class FileRecord:
+    """A single file discovered by the project scanner.
+
+    Size and mtime come from the walk itself; the content and its hash are
+    only read from disk the first time an agent asks for them, and are then
+    shared by every agent that selects the file.
+
+    Binary files (a NUL byte in the first ``SNIFF_BYTES``) have no content.
+    Only the first ``max_bytes`` of a file are read, through ``mmap`` for
+    large files, and invalid UTF-8 is replaced instead of failing the read.
+    """
+
+    def __init__(self, path, size, mtime, max_bytes=DEFAULT_MAX_READ_BYTES):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.max_bytes = max_bytes
+        self.binary = False
+        self.truncated = False
+        self.skipped = False
+        self.bytes_read = 0
+        self._content = None
+        self._hash = None
+        self._loaded = False
+        # Held while the file is read, so concurrent readers wait for the one read instead of repeating it
+        self._lock = threading.Lock()
+
+    def _read_bytes(self, limit):
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if mapped.find(b'\0', 0, SNIFF_BYTES) != -1:
+                        return None, size
+                    return mapped[:limit], size
+            data = f.read(limit)
+            if b'\0' in data[:SNIFF_BYTES]:
+                return None, size
+            return data, size
+
+    def load(self, limit=None):
+        """Read the file now, at most ``limit`` (default ``max_bytes``) bytes; returns the number of bytes read."""
+        with self._lock:
+            return self._load(limit)
+
+    def _load(self, limit):
+        # The caller holds self._lock
+        if self._loaded:
+            return 0
+        read = 0
+        try:
+            data, size = self._read_bytes(min(limit, self.max_bytes) if limit is not None else self.max_bytes)
+            if data is None:
+                self.binary = True
+            else:
+                read = len(data)
+                self.truncated = size > len(data)
+                self._content = data.decode('utf-8', errors='replace')
+        except Exception as e:
+            print(f"Error reading file {self.path}: {str(e)}")
+        self.bytes_read = read
+        # Set last so agents running on other threads never see a half-loaded record
+        self._loaded = True
+        return read
+
+    def skip(self):
+        """Leave the file unread, e.g. once the inventory's read budget is spent (the caller holds ``_lock``)."""
+        if not self._loaded:
+            self.skipped = True
+            self._loaded = True
+
+    @property
+    def content(self):
+        if not self._loaded:
+            self.load()
+        return self._content
+
+    @property
+    def content_hash(self):
+        if self._hash is None and self.content is not None:
+            self._hash = hashlib.sha256(self.content.encode('utf-8')).hexdigest()
+        return self._hash
+
+
+class FileInventory:
+    """
+    In-memory inventory of every file under the project root.
+
+    Contents are bulk-loaded on a thread pool by ``preload``; once
+    ``max_total_bytes`` have been read, remaining files are skipped.
+    """
+
+    def __init__(self, project_root, records, ignore_engine=None, max_file_bytes=DEFAULT_MAX_READ_BYTES,
+                 max_total_bytes=DEFAULT_MAX_TOTAL_BYTES, load_workers=DEFAULT_LOAD_WORKERS):
+        self.project_root = project_root
+        self.records = records
+        self.ignore_engine = ignore_engine
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.load_workers = max(1, load_workers)
+        self.bytes_loaded = 0
+        self._budget_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def select(self, predicate):
+        """Return the records whose path satisfies ``predicate``."""
+        return [record for record in self.records if predicate(record.path)]
+
+    def _load_record(self, record):
+        with self._budget_lock:
+            # Claim the record; a record being (or already) read by another agent is not charged again
+            if not record._lock.acquire(blocking=False):
+                return 0
+            if record._loaded:
+                record._lock.release()
+                return 0
+            if self.bytes_loaded >= self.max_total_bytes:
+                record.skip()
+                record._lock.release()
+                return 0
+            # Reserve the expected size so concurrent reads cannot overshoot the budget by much
+            limit = self.max_total_bytes - self.bytes_loaded
+            reserved = min(record.size, record.max_bytes, limit)
+            self.bytes_loaded += reserved
+        try:
+            read = record._load(limit)
+        finally:
+            record._lock.release()
+        with self._budget_lock:
+            self.bytes_loaded += read - reserved
+        return read
+
+    def preload(self, records):
+        """
+        Read the not yet loaded ``records`` in parallel, within the per-file and total byte budgets.
+
+        Each file is read once even when agents preload it concurrently; a
+        record another agent is still reading is ready when its ``content``
+        is accessed.
+
+        :return: The number of bytes read by this call
+        """
+        pending = [record for record in records if not record._loaded]
+        if not pending:
+            return 0
+        if len(pending) == 1 or self.load_workers == 1:
+            read = sum(self._load_record(record) for record in pending)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.load_workers, len(pending)), thread_name_prefix="file-loader") as executor:
+                read = sum(executor.map(self._load_record, pending))
+        skipped = sum(1 for record in pending if record.skipped)
+        if skipped:
+            print(f"Skipped {skipped} file(s): total read budget of {self.max_total_bytes} bytes reached")
+        return read
+
+    def load(self, predicate):
+        """Return ``(file_paths, file_contents)`` for the readable files matching ``predicate``."""
+        file_paths = []
+        file_contents = []
+        records = self.select(predicate)
+        self.preload(records)
+        for record in records:
+            if record.content is not None:
+                file_paths.append(record.path)
+                file_contents.append(record.content)
+        return file_paths, file_contents
+
+    def is_ignored(self, path, is_dir=False):
+        """Return True if ``path`` lies outside the project or is excluded by its ignore rules."""
+        rel_path = os.path.relpath(path, self.project_root).replace(os.sep, '/')
+        if rel_path == '..' or rel_path.startswith('../'):
+            return True
+        return self.ignore_engine is not None and self.ignore_engine.is_ignored(rel_path, is_dir)
+
+    def refresh(self, paths):
+        """
+        Re-stat ``paths`` in place, adding new files and dropping deleted ones.
+
+        Records that are not listed keep their cached content, so callers that
+        know what changed (e.g. a file watcher) can skip a full re-scan. The
+        bytes read for replaced records go back to the total read budget.
+        """
+        paths = {os.path.abspath(path) for path in paths}
+        records, released = [], 0
+        for record in self.records:
+            if os.path.abspath(record.path) in paths:
+                released += record.bytes_read
+            else:
+                records.append(record)
+        with self._budget_lock:
+            self.bytes_loaded -= released
+        for path in sorted(paths):
+            if not os.path.isfile(path) or self.is_ignored(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            records.append(FileRecord(path, stat.st_size, stat.st_mtime, self.max_file_bytes))
+        self.records = records
+
+
+def _walk(project_root, engine, max_file_bytes):
+    records = []
+    for root_dir, dirs, files in os.walk(project_root):
+        rel_dir = os.path.relpath(root_dir, project_root).replace(os.sep, '/')
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        if prefix:
+            for name in IGNORE_FILES:
+                if name in files:
+                    engine.add_ignore_file(os.path.join(root_dir, name), prefix)
+
+        dirs[:] = [d for d in dirs if not engine.match(prefix + d, True)]
+        for file in files:
+            if engine.match(prefix + file):
+                continue
+            file_path = os.path.join(root_dir, file)
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                print(f"Error reading file {file_path}: {str(e)}")
+                continue
+            records.append(FileRecord(file_path, stat.st_size, stat.st_mtime, max_file_bytes))
+    return records
+
+
+def scan_project(project_root, ignore_patterns=None):
+    """
+    Walk ``project_root`` once and build a :class:`FileInventory`.
+
+    Ignored directories are pruned in place so the walk never descends into
+    them. ``ignore_patterns`` defaults to ``IGNORE_PATTERNS`` from
+    butterfly.config.py; ``.gitignore`` and ``.butterflyignore`` files found
+    along the way are honoured as well. Read budgets and loader threads come
+    from ``READ_MAX_FILE_BYTES``, ``READ_MAX_TOTAL_BYTES`` and ``LOAD_WORKERS``.
+    """
+    try:
+        config = load_config(project_root)
+    except FileNotFoundError:
+        if ignore_patterns is None:
+            raise
+        config = {}
+    if ignore_patterns is None:
+        ignore_patterns = config.get('IGNORE_PATTERNS', [])
+    max_file_bytes = config.get('READ_MAX_FILE_BYTES', DEFAULT_MAX_READ_BYTES)
+    engine = load_ignore_engine(project_root, ignore_patterns)
+
+    with span("walk") as walk:
+        records = _walk(project_root, engine, max_file_bytes)
+        walk.set(files=len(records))
+    return FileInventory(
+        project_root, records, engine,
+        max_file_bytes=max_file_bytes,
+        max_total_bytes=config.get('READ_MAX_TOTAL_BYTES', DEFAULT_MAX_TOTAL_BYTES),
+        load_workers=config.get('LOAD_WORKERS', DEFAULT_LOAD_WORKERS),
+    )
@@ -0,0 +1,97 @@
+import json
+import threading
+from .chunker import estimate_tokens, pack_batches
+from .skeleton import DEFAULT_MAX_FILE_BYTES, compact_files
+
+SHARED_SYSTEM_PROMPT = (
+    "You are part of a team of code analysis agents reviewing the same codebase. "
+    "The codebase follows; after it you will be told which analysis to perform and which tool to report it with."
+)
+
+
+class SharedContext:
+    """
+    The codebase part of the prompt, byte-identical for every agent of a run.
+
+    Providers cache prompts by exact prefix (tool definitions included), so
+    requests are laid out as: every agent's tool, a fixed system prompt and
+    the codebase, which never vary between agents, then the agent's own
+    system prompt and instruction, and the agent's tool is forced through
+    ``tool_choice``. Files are sorted and packed into the same batches for
+    every agent. The first request of each batch is sent alone, so the
+    others can be answered from the provider's prompt cache.
+    """
+
+    def __init__(self, file_paths, file_contents, tools, max_prompt_tokens=100000, content_mode="full",
+                 max_file_bytes=DEFAULT_MAX_FILE_BYTES, reserved_tokens=0, warm_first=True):
+        """
+        :param tools: Tool definitions of all agents sharing the context
+        :param reserved_tokens: Budget kept free for the largest agent-specific system prompt and instruction
+        :param warm_first: Hold back the other agents until the first request of a batch has been answered
+        """
+        self.tools = sorted(tools, key=lambda tool: tool["function"]["name"])
+        ordered = sorted(zip(file_paths, file_contents))
+        paths, contents = compact_files([p for p, _ in ordered], [c for _, c in ordered], content_mode, max_file_bytes)
+        overhead = estimate_tokens(SHARED_SYSTEM_PROMPT + json.dumps(self.tools)) + reserved_tokens
+        self.batches = pack_batches(paths, contents, max(1, max_prompt_tokens - overhead)) if paths else []
+        self.prefixes = [
+            "\n\n".join(f"File: {path}\n\nContent:\n{content}" for path, content in zip(*batch)) for batch in self.batches
+        ]
+        self.warm_first = warm_first
+        self._lock = threading.Lock()
+        self._warmed = {}
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.requests = 0
+
+    def __len__(self):
+        return len(self.batches)
+
+    def build_messages(self, index, system_prompt, instruction):
+        return [
+            {"role": "system", "content": SHARED_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Codebase:\n\n{self.prefixes[index]}"},
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": instruction},
+        ]
+
+    def request(self, index, send):
+        """
+        Call ``send()`` for batch ``index``; the first caller of a batch goes alone.
+
+        Concurrent requests with the same prefix all miss the provider's cache,
+        so later agents wait (once) until the first request has been answered.
+        """
+        if not self.warm_first:
+            return send()
+        with self._lock:
+            warmed = self._warmed.get(index)
+            leader = warmed is None
+            if leader:
+                warmed = self._warmed[index] = threading.Event()
+        if not leader:
+            warmed.wait()
+            return send()
+        try:
+            return send()
+        finally:
+            warmed.set()
+
+    def record_usage(self, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.cached_tokens += getattr(details, "cached_tokens", None) or 0
+
+    def usage(self):
+        """Prompt tokens sent and how many of them the provider served from its prompt cache."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "promptTokens": self.prompt_tokens,
+                "cachedTokens": self.cached_tokens,
+                "cachedRatio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            }
@@ -0,0 +1,174 @@
+import os
+import re
+import ast
+import json
+import builtins
+from .ast_parse import parse as parse_python
+
+CONTENT_MODES = ('full', 'skeleton')
+DEFAULT_MAX_FILE_BYTES = 256 * 1024
+
+# Files Butterfly writes itself; never worth sending back to the model
+TOOL_OUTPUT_FILES = {'json.json', 'history.jsonl', 'history.jsonl.idx', 'butterfly.config.py', 'telemetry.jsonl', 'metrics.prom'}
+
+DATA_EXTENSIONS = ('.json', '.xml', '.csv', '.tsv', '.lock', '.yaml', '.yml', '.toml', '.ini', '.svg', '.map')
+_GENERATED_MARKERS = re.compile(r'@generated|DO NOT EDIT|auto-?generated|autogenerated', re.IGNORECASE)
+
+_SIGNATURE = re.compile(
+    r'^\s*(?:export\s+|public\s+|private\s+|protected\s+|internal\s+|static\s+|abstract\s+|async\s+|default\s+)*'
+    r'(?:import\b|from\b|require\b|package\b|using\b|use\b|module\b|namespace\b|include\b|#include\b|'
+    r'class\b|interface\b|trait\b|struct\b|enum\b|type\b|impl\b|def\b|fn\b|func\b|function\b|'
+    r'const\s+\w+\s*=\s*(?:async\s*)?(?:\(|function)|[\w<>\[\],\s]+\s+\w+\s*\([^;]*\)\s*\{?\s*$)'
+)
+_MAX_CALLS = 20
+_MAX_SIGNATURE_LINES = 400
+
+
+def _docstring(node, limit=300):
+    doc = ast.get_docstring(node)
+    if not doc:
+        return None
+    doc = doc.strip().split('\n\n', 1)[0]
+    return doc if len(doc) <= limit else doc[:limit] + '...'
+
+
+def _calls(node):
+    """Names of the functions called directly in ``node``'s body (the file's call edges)."""
+    names = []
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call) and isinstance(child.func, (ast.Name, ast.Attribute)):
+            name = ast.unparse(child.func)
+            if len(name) <= 60 and '(' not in name and not hasattr(builtins, name) and name not in names:
+                names.append(name)
+    return names[:_MAX_CALLS]
+
+
+def _signature(node):
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ''
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}:"
+
+
+def _python_lines(nodes, indent, lines):
+    pad = '    ' * indent
+    for node in nodes:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(pad + ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            lines.extend(f"{pad}@{ast.unparse(decorator)}" for decorator in node.decorator_list)
+            if isinstance(node, ast.ClassDef):
+                bases = ', '.join(ast.unparse(base) for base in node.bases + node.keywords)
+                lines.append(f"{pad}class {node.name}({bases}):" if bases else f"{pad}class {node.name}:")
+            else:
+                lines.append(pad + _signature(node))
+            doc = _docstring(node)
+            if doc:
+                lines.append(f'{pad}    """{doc}"""')
+            if isinstance(node, ast.ClassDef):
+                _python_lines(node.body, indent + 1, lines)
+            else:
+                calls = _calls(node)
+                if calls:
+                    lines.append(f"{pad}    # calls: {', '.join(calls)}")
+                lines.append(f"{pad}    ...")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and indent <= 1:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [ast.unparse(target) for target in targets]
+            if any(name.isupper() or name == '__all__' or indent == 1 for name in names):
+                lines.append(f"{pad}{' = '.join(names)} = ...")
+        elif isinstance(node, ast.If) and indent == 0 and "__name__" in ast.unparse(node.test):
+            lines.append(f"if {ast.unparse(node.test)}:")
+            calls = _calls(node)
+            lines.append(f"    # calls: {', '.join(calls)}" if calls else "    ...")
+
+
+def python_skeleton(content):
+    """Imports, class/function signatures, docstrings and call edges of a Python module; None if it does not parse."""
+    try:
+        tree = parse_python(content)
+    except (SyntaxError, ValueError):
+        return None
+    lines = []
+    doc = _docstring(tree)
+    if doc:
+        lines.append(f'"""{doc}"""')
+    _python_lines(tree.body, 0, lines)
+    return '\n'.join(lines)
+
+
+def _describe_json(value, depth=0):
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"object({len(value)} keys)"
+        items = list(value.items())
+        described = {key: _describe_json(item, depth + 1) for key, item in items[:30]}
+        if len(items) > 30:
+            described['...'] = f"{len(items) - 30} more keys"
+        return described
+    if isinstance(value, list):
+        return f"array({len(value)})" + (f" of {_describe_json(value[0], depth + 1)}" if value and depth < 2 else '')
+    return type(value).__name__
+
+
+def data_skeleton(path, content):
+    """Shape of a data file rather than its values."""
+    size = len(content)
+    if path.endswith('.json'):
+        try:
+            shape = json.dumps(_describe_json(json.loads(content)), indent=1)
+            return f"# data file, {size} characters; structure:\n{shape}"
+        except ValueError:
+            pass
+    head = '\n'.join(content.splitlines()[:20])
+    return f"# data file, {size} characters; first lines:\n{head}"
+
+
+def text_skeleton(content):
+    """Signature-like lines (imports, declarations) of a source file in any other language."""
+    lines = [line.rstrip() for line in content.splitlines() if len(line) < 300 and _SIGNATURE.match(line)]
+    return '\n'.join(lines[:_MAX_SIGNATURE_LINES])
+
+
+def looks_generated(path, content):
+    if path.endswith(('.min.js', '.min.css', '.bundle.js', '_pb2.py', '.pb.go')):
+        return True
+    head = content[:2000]
+    if _GENERATED_MARKERS.search(head):
+        return True
+    lines = head.count('\n') + 1
+    return len(head) / lines > 500  # minified
+
+
+def file_skeleton(path, content):
+    if os.path.basename(path).lower().endswith(DATA_EXTENSIONS):
+        return data_skeleton(path, content)
+    if path.endswith('.py'):
+        skeleton = python_skeleton(content)
+        if skeleton is not None:
+            return skeleton
+    return text_skeleton(content)
+
+
+def compact_files(file_paths, file_contents, mode='full', max_file_bytes=DEFAULT_MAX_FILE_BYTES):
+    """
+    Prepare file contents for a prompt.
+
+    In ``skeleton`` mode every file is reduced to its structure. In ``full``
+    mode files are sent as they are, except generated files and files over
+    ``max_file_bytes``, which are reduced too. Either way Butterfly's own
+    output files are dropped and nothing longer than ``max_file_bytes`` is
+    sent.
+
+    :return: A tuple of (file_paths, file_contents)
+    """
+    paths, contents = [], []
+    for path, content in zip(file_paths, file_contents):
+        if os.path.basename(path) in TOOL_OUTPUT_FILES:
+            continue
+        if mode == 'skeleton' or len(content) > max_file_bytes or looks_generated(path, content):
+            content = file_skeleton(path, content)
+        if len(content) > max_file_bytes:
+            content = content[:max_file_bytes] + f"\n... [truncated, {len(content) - max_file_bytes} more characters]"
+        paths.append(path)
+        contents.append(content)
+    return paths, contents
@@ -0,0 +1,92 @@
+import json
+
+_OPENERS = '{['
+_CLOSERS = '}]'
+_WHITESPACE = ' \t\r\n'
+
+
+class ToolArgumentsParser:
+    """
+    Incremental parser for the JSON arguments of a streamed tool call.
+
+    Argument text is fed in as it arrives; ``feed`` returns the items of the
+    top-level object's array fields that were completed by that chunk, as
+    ``(field, item)`` pairs, so findings can be shown long before the whole
+    object has been received. Only item boundaries are tracked here: each
+    finished item is decoded on its own with ``json.loads``, and the full
+    argument text is still validated by the analysis model at the end.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.expect_key = False
+        self.key = None
+        self.in_array = False
+        self.item_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        completed = []
+        text = self.text
+        for pos in range(self.pos, len(text)):
+            c = text[pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect_key:
+                        self.key = json.loads(text[self.string_start:pos + 1])
+                continue
+
+            if c == '"':
+                self.in_string = True
+                self.string_start = pos
+                self._start_item(pos)
+            elif c in _OPENERS:
+                if self.depth == 1 and c == '[':
+                    self.in_array = True
+                    self.item_start = None
+                else:
+                    self._start_item(pos)
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif c in _CLOSERS:
+                self.depth -= 1
+                if self.depth == 1 and self.in_array and c == ']':
+                    self._finish_item(pos, completed)
+                    self.in_array = False
+            elif c == ',':
+                if self.depth == 2 and self.in_array:
+                    self._finish_item(pos, completed)
+                elif self.depth == 1:
+                    self.expect_key = True
+            elif c == ':':
+                if self.depth == 1:
+                    self.expect_key = False
+            elif c not in _WHITESPACE:
+                self._start_item(pos)
+        self.pos = len(text)
+        return completed
+
+    def _start_item(self, pos):
+        if self.depth == 2 and self.in_array and self.item_start is None:
+            self.item_start = pos
+
+    def _finish_item(self, pos, completed):
+        if self.item_start is None:
+            return
+        raw = self.text[self.item_start:pos]
+        self.item_start = None
+        try:
+            completed.append((self.key, json.loads(raw)))
+        except json.JSONDecodeError:
+            pass
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Pipeline stages recorded as spans: walk, filter, read, local_analysis,
+# prompt_build, cache_lookup, model_request, parse, report; plus the
+# enclosing analysis (one per ManagerAgent run) and agent spans.
+_sinks = []
+_current = contextvars.ContextVar('butterfly_span', default=None)
+
+
+class Span:
+    """One timed stage of an analysis run, with free-form numeric and string attributes."""
+
+    recording = True
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    recording = False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def configure_telemetry(*sinks):
+    """Replace the active sinks; with none, spans cost next to nothing."""
+    _sinks[:] = sinks
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def current_span():
+    """The innermost open span of this thread/context, or a no-op span."""
+    return _current.get() or _NOOP
+
+
+def _notify(method, span):
+    for sink in _sinks:
+        try:
+            getattr(sink, method)(span)
+        except Exception as e:
+            print(f"❌ Telemetry sink {type(sink).__name__} failed: {e}")
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the enclosed block as a child of the current span.
+
+    :param attributes: Labels of the span (e.g. ``agent``); more can be added with ``.set()``
+    """
+    if not _sinks:
+        yield _NOOP
+        return
+    current = Span(name, _current.get(), attributes)
+    token = _current.set(current)
+    _notify('span_started', current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.finish()
+        _current.reset(token)
+        _notify('span_finished', current)
+
+
+def propagate(fn):
+    """
+    Wrap ``fn`` so it runs under the spans open right now, even on another thread.
+
+    Thread pools do not carry context variables over to their workers; wrap
+    the submitted callable to keep its spans attached to the submitting one.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def record_usage(target, usage):
+    """Copy the token counts of an OpenAI ``usage`` object onto ``target``."""
+    if usage is None or not target.recording:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    target.set(
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0,
+        cached_tokens=getattr(details, 'cached_tokens', None) or 0,
+    )
+
+
+class TelemetrySink:
+    """Receives spans as they open and close; override what you need."""
+
+    def span_started(self, span):
+        pass
+
+    def span_finished(self, span):
+        pass
+
+
+class JsonLogSink(TelemetrySink):
+    """Append every finished span as one JSON line to ``path``."""
+
+    def __init__(self, path='telemetry.jsonl'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def span_finished(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _labels(labels):
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for value in labels.values()
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+class PrometheusSink(TelemetrySink):
+    """
+    Aggregate spans into Prometheus counters.
+
+    ``render()`` returns the text exposition format. With ``path`` set the
+    metrics are also written there (atomically) whenever a top-level span
+    finishes, for the api-generation app's ``/metrics`` endpoint or a node
+    exporter textfile collector to serve.
+    """
+
+    METRICS = {
+        'butterfly_stage_seconds': ('summary', "Time spent per pipeline stage"),
+        'butterfly_stage_errors_total': ('counter', "Pipeline stages that raised"),
+        'butterfly_model_requests_total': ('counter', "Model requests sent"),
+        'butterfly_tokens_total': ('counter', "Tokens reported in the model's usage"),
+        'butterfly_request_bytes_total': ('counter', "Bytes of prompts and tool schemas sent to the model"),
+        'butterfly_bytes_read_total': ('counter', "Bytes of project files read from disk"),
+        'butterfly_cache_lookups_total': ('counter', "Result cache lookups"),
+    }
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._values = {name: {} for name in self.METRICS}
+
+    def _add(self, metric, amount, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._values[metric]
+        total, count = series.get(key, (0, 0))
+        series[key] = (total + amount, count + 1)
+
+    def span_finished(self, span):
+        attributes = span.attributes
+        agent = attributes.get('agent', '')
+        with self._lock:
+            self._add('butterfly_stage_seconds', span.duration, stage=span.name, agent=agent)
+            if span.error:
+                self._add('butterfly_stage_errors_total', 1, stage=span.name, agent=agent)
+            if span.name == 'model_request':
+                self._add('butterfly_model_requests_total', 1, agent=agent, model=attributes.get('model', ''))
+                for kind in ('prompt', 'completion', 'cached'):
+                    self._add('butterfly_tokens_total', attributes.get(f'{kind}_tokens', 0), agent=agent, type=kind)
+                self._add('butterfly_request_bytes_total', attributes.get('bytes_sent', 0), agent=agent)
+            elif span.name == 'read':
+                self._add('butterfly_bytes_read_total', attributes.get('bytes', 0), agent=agent)
+            elif span.name == 'cache_lookup':
+                self._add('butterfly_cache_lookups_total', 1, agent=agent, result='hit' if attributes.get('hit') else 'miss')
+        if self.path and span.parent_id is None:
+            self.write()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for metric, (kind, description) in self.METRICS.items():
+                series = self._values[metric]
+                if not series:
+                    continue
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for key, (total, count) in sorted(series.items()):
+                    labels = _labels(dict(key))
+                    if kind == 'summary':
+                        lines.append(f"{metric}_sum{labels} {total}")
+                        lines.append(f"{metric}_count{labels} {count}")
+                    else:
+                        lines.append(f"{metric}{labels} {total}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        text = self.render()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+
+class OpenTelemetrySink(TelemetrySink):
+    """
+    Mirror spans into OpenTelemetry, keeping their parent/child structure.
+
+    Needs ``opentelemetry-api``; exporting is left to whatever SDK and
+    exporter the process configured (e.g. OTLP). ``tracer`` defaults to the
+    global tracer provider's ``butterfly`` tracer.
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace  # optional dependency
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('butterfly')
+        self._lock = threading.Lock()
+        self._open = {}
+
+    def span_started(self, span):
+        with self._lock:
+            parent = self._open.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self.tracer.start_span(
+            span.name, context=context, attributes=span.attributes, start_time=int(span.start * 1e9)
+        )
+        with self._lock:
+            self._open[span.span_id] = otel_span
+
+    def span_finished(self, span):
+        with self._lock:
+            otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes({k: v for k, v in span.attributes.items() if isinstance(v, (str, bool, int, float))})
+        if span.error:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.start + span.duration) * 1e9))
+